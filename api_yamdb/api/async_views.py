@@ -0,0 +1,46 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from core.db import schedule_health_checks
+from django.db import close_old_connections
+
+# Маршруты, которые под ASGI обслуживаются асинхронными вьюхами.
+ASYNC_ROUTES = ('title-list', 'title-detail', 'reviews-list',
+                'comments-list')
+
+
+def as_async_view(view):
+    '''Асинхронная обёртка для DRF-вьюхи.
+
+    Под ASGI Django выполняет синхронные вьюхи в одном общем потоке
+    (thread_sensitive), и запросы процесса идут по одному. Обёртка
+    запускает вьюху в пуле потоков asgiref: каждый поток работает со
+    своим соединением с базой, как воркер WSGI.
+    '''
+    def run(request, *args, **kwargs):
+        # request_started отработал в другом потоке, поэтому соединения
+        # этого потока готовим к запросу сами.
+        close_old_connections()
+        schedule_health_checks()
+        try:
+            response = view(request, *args, **kwargs)
+            # Рендеринг тоже обращается к базе, его делаем в этом потоке.
+            return response.render()
+        finally:
+            close_old_connections()
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await sync_to_async(run, thread_sensitive=False)(
+            request, *args, **kwargs
+        )
+
+    return async_view
+
+
+def asyncify_routes(urlpatterns, names=ASYNC_ROUTES):
+    '''Заменяет вьюхи маршрутов names на асинхронные обёртки.'''
+    for pattern in urlpatterns:
+        if getattr(pattern, 'name', None) in names:
+            pattern.callback = as_async_view(pattern.callback)
+    return urlpatterns
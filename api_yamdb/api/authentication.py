@@ -0,0 +1,98 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+KEY_PREFIX = 'auth'
+# Поля, которых достаточно разрешениям; остальные загрузятся по требованию.
+AUTH_FIELDS = ('id', 'username', 'role', 'is_staff', 'is_superuser',
+               'is_active')
+CLAIM_FIELDS = AUTH_FIELDS[1:-1]
+STAMP_CLAIM = 'auth_stamp'
+
+
+def stamp_key(user_id) -> str:
+    return f'{KEY_PREFIX}:stamp:{user_id}'
+
+
+def auth_stamp(values) -> str:
+    '''Отпечаток полей доступа: меняется вместе с ролью и именем.'''
+    source = ':'.join(str(value) for value in values)
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def user_values(user):
+    return tuple(getattr(user, field) for field in AUTH_FIELDS)
+
+
+def issue_access_token(user) -> AccessToken:
+    '''Токен с ролью пользователя в claims.'''
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[STAMP_CLAIM] = auth_stamp(user_values(user))
+    return token
+
+
+def forget_user(user_id) -> None:
+    '''Сбрасывает отпечаток сразу и ещё раз после коммита транзакции.'''
+    def delete():
+        cache.delete(stamp_key(user_id))
+    delete()
+    transaction.on_commit(delete)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    '''JWT-аутентификация без запроса пользователя на каждый запрос.
+
+    Пользователь собирается из claims токена, если их отпечаток совпадает
+    с закэшированным. Иначе (токен выдан до смены роли или кэш истёк)
+    поля доступа читаются из базы одним запросом.
+    '''
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise AuthenticationFailed(
+                _('Token contained no recognizable user identification')
+            )
+        claims = (user_id, *(
+            validated_token.get(field) for field in CLAIM_FIELDS
+        ), True)
+        key = stamp_key(user_id)
+        stamp = cache.get(key)
+        if stamp is not None and stamp == validated_token.get(STAMP_CLAIM):
+            return self.build_user(claims)
+
+        values = User.objects.filter(pk=user_id).values_list(
+            *AUTH_FIELDS
+        ).first()
+        if values is None:
+            raise AuthenticationFailed(_('User not found'),
+                                       code='user_not_found')
+        cache.set(key, auth_stamp(values),
+                  timeout=settings.AUTH_STAMP_CACHE_TIMEOUT)
+        if not values[-1]:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        return self.build_user(values)
+
+    @staticmethod
+    def build_user(values):
+        '''Экземпляр с отложенными полями, как у .only(*AUTH_FIELDS).'''
+        loaded = dict(zip(AUTH_FIELDS, values))
+        names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in loaded
+        ]
+        return User.from_db(
+            User.objects.db, names, [loaded[name] for name in names]
+        )
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .mixins import ReplicaReadMixin
+
+
+def failure(code: int, errors) -> dict:
+    return {'status': code, 'errors': errors}
+
+
+class BatchCreateView(ReplicaReadMixin, APIView):
+    '''Пакетное создание объектов от имени пользователя запроса.
+
+    Принимает `{"items": [...]}` (не больше BATCH_MAX_ITEMS элементов),
+    проверяет родителей и конфликты запросами на весь пакет и вставляет
+    объекты одним bulk_create в транзакции. Ответ 207 содержит статус
+    каждого элемента в порядке запроса: ошибка одного элемента не
+    отменяет остальные. bulk_create не отправляет сигналы, поэтому
+    производные данные обновляет `after_create`. После пакета автор
+    читает основную базу, как после обычной записи.
+    '''
+    permission_classes = (permissions.IsAuthenticated,)
+    model = None
+    parent_model = None
+    parent_field = None
+    item_serializer_class = None
+    serializer_class = None
+
+    def post(self, request):
+        items = self.get_items(request.data)
+        results = [None] * len(items)
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = self.item_serializer_class(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                results[index] = failure(
+                    status.HTTP_400_BAD_REQUEST, serializer.errors
+                )
+        created, rejected = self.create_valid(valid)
+        for index, result in rejected.items():
+            results[index] = result
+        data = self.serializer_class(
+            list(created.values()), many=True,
+            context={'request': request, 'view': self},
+        ).data
+        for index, item in zip(created, data):
+            results[index] = {'status': status.HTTP_201_CREATED, 'data': item}
+        return Response(
+            {'results': results}, status=status.HTTP_207_MULTI_STATUS
+        )
+
+    def get_throttle_cost(self, request):
+        '''Пакет расходует лимит области по единице на элемент.'''
+        data = request.data
+        items = data.get('items') if isinstance(data, dict) else None
+        return len(items) if isinstance(items, list) and items else 1
+
+    @staticmethod
+    def get_items(data):
+        items = data.get('items') if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'items': ['Ожидается непустой список.']})
+        if len(items) > settings.BATCH_MAX_ITEMS:
+            raise ValidationError({'items': [
+                f'Не больше {settings.BATCH_MAX_ITEMS} элементов за запрос.'
+            ]})
+        return items
+
+    def create_valid(self, valid):
+        '''Вставляет элементы, прошедшие проверки пакета.
+
+        Возвращает созданные объекты и отказы по индексам элементов.
+        '''
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    return self.insert(valid)
+            except IntegrityError:
+                # Конкурентная вставка между проверкой и bulk_create:
+                # повторяем проверки, они увидят новые строки.
+                if attempt:
+                    raise
+
+    def insert(self, valid):
+        rejected = self.check_items(valid)
+        accepted = [index for index in valid if index not in rejected]
+        instances = self.model.objects.bulk_create(
+            self.model(author=self.request.user, **valid[index])
+            for index in accepted
+        )
+        if instances:
+            if instances[0].pk is None:
+                self.fill_pks(instances)
+            self.after_create(instances)
+        return dict(zip(accepted, instances)), rejected
+
+    def check_items(self, valid):
+        '''Отказы для элементов, чей родитель не существует.'''
+        key = f'{self.parent_field}_id'
+        existing = set(self.parent_model.objects.filter(
+            pk__in={data[key] for data in valid.values()}
+        ).values_list('pk', flat=True))
+        return {
+            index: failure(status.HTTP_404_NOT_FOUND, {
+                self.parent_field: ['Объект не найден.']
+            })
+            for index, data in valid.items() if data[key] not in existing
+        }
+
+    def fill_pks(self, instances):
+        '''Без RETURNING (SQLite) находит id вставленных строк.
+
+        Строки пакета — строки этого автора с проставленными pre_save
+        датами; id выдаются по порядку вставки.
+        '''
+        pks = self.model.objects.filter(
+            author=self.request.user,
+            pub_date__in={instance.pub_date for instance in instances},
+        ).order_by('pk').values_list('pk', flat=True)
+        for instance, pk in zip(instances, pks):
+            instance.pk = pk
+
+    def after_create(self, instances):
+        pass
@@ -0,0 +1,87 @@
+import hashlib
+import time
+import uuid
+from typing import Dict, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+KEY_PREFIX = 'response'
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def scope_key(scope: str) -> str:
+    '''Версия набора: меняется, когда меняется состав списков.'''
+    return f'{KEY_PREFIX}:scope:{scope}'
+
+
+def object_key(scope: str, pk) -> str:
+    '''Версия отдельного объекта набора.'''
+    return f'{KEY_PREFIX}:{scope}:{pk}'
+
+
+def request_key(request) -> str:
+    '''Ключ ответа: путь, параметры запроса, формат и роль пользователя.'''
+    user = request.user
+    if not user.is_authenticated:
+        role = 'anonymous'
+    elif user.is_admin:
+        role = 'admin'
+    else:
+        role = user.role
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    renderer = request.accepted_renderer.format
+    source = f'{role}:{renderer}:{request.path}?{query}'
+    digest = hashlib.md5(source.encode()).hexdigest()
+    return f'{KEY_PREFIX}:page:{digest}'
+
+
+def new_version(changed_at: float = 0.0) -> str:
+    '''Случайный токен версии и время изменения данных.'''
+    return f'{uuid.uuid4().hex}:{changed_at}'
+
+
+def changed_since(versions: Dict[str, str], moment: float) -> bool:
+    '''Какая-то из версий сброшена записью позже moment.'''
+    return any(
+        float(version.partition(':')[2] or 0) > moment
+        for version in versions.values()
+    )
+
+
+def current_versions(keys: Iterable[str]) -> Dict[str, str]:
+    '''Текущие версии; отсутствующие создаются заново.
+
+    Версия — случайный токен, а не счётчик: если её вытеснит LRU,
+    новый токен не совпадёт ни с одной сохранённой записью.
+    '''
+    cache = get_cache()
+    keys = list(keys)
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, new_version(), timeout=None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def invalidate(*keys: str) -> None:
+    '''Сбрасывает версии сразу и ещё раз после коммита транзакции.
+
+    Второй сброс не даёт закэшировать данные, прочитанные между
+    изменением и коммитом. Время сброса хранится в версии: пока реплика
+    может отставать, прочитанные с неё ответы не кэшируются.
+    '''
+    def bump():
+        changed_at = time.time()
+        get_cache().set_many(
+            {key: new_version(changed_at) for key in keys}, timeout=None
+        )
+    bump()
+    transaction.on_commit(bump)
@@ -1,4 +1,10 @@
 import django_filters
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
 from reviews.models import Title
 
 
@@ -7,7 +13,64 @@ class TitleFilter(django_filters.FilterSet):
     year = django_filters.NumberFilter(field_name='year')
     category = django_filters.CharFilter(field_name='category__slug')
     genre = django_filters.CharFilter(field_name='genre__slug')
+    search = django_filters.CharFilter(method='filter_search')
+
+    def filter_search(self, queryset, name, value):
+        '''Полнотекстовый поиск по названию и описанию с ранжированием.
+
+        На PostgreSQL используется хранимый вектор с GIN-индексом,
+        на остальных базах — icontains.
+        '''
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value)
+            )
+        query = SearchQuery(
+            value, config=settings.TITLE_SEARCH_CONFIG,
+            search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', 'name')
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('name', 'year', 'category', 'genre', 'search')
+
+
+class StoredFieldOrderingFilter(filters.OrderingFilter):
+    '''Сортировка ?ordering= по хранимым полям, покрытым индексами.
+
+    К порядку добавляется id в том же направлении, чтобы страницы были
+    однозначными; пустые значения идут в конце. Без параметра порядок
+    queryset (например, по релевантности поиска) не меняется, а
+    `ordering` вьюсета задаёт порядок курсорной пагинации.
+    '''
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if ordering and ordering[-1].lstrip('-') != 'id':
+            descending = ordering[-1].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    def filter_queryset(self, request, queryset, view):
+        if self.ordering_param not in request.query_params:
+            return queryset
+        expressions = []
+        for term in self.get_ordering(request, queryset, view):
+            name = term.lstrip('-')
+            expression = F(name)
+            if not queryset.model._meta.get_field(name).null:
+                expressions.append(term)
+                continue
+            if 'cursor' in request.query_params:
+                raise ValidationError({self.ordering_param: (
+                    f'Курсорная пагинация не поддерживает сортировку '
+                    f'по полю {name}.'
+                )})
+            if term.startswith('-'):
+                expressions.append(expression.desc(nulls_last=True))
+            else:
+                expressions.append(expression.asc(nulls_last=True))
+        return queryset.order_by(*expressions)
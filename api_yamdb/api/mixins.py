@@ -1,10 +1,227 @@
+import hashlib
+import time
+
+from core.routers import (is_pinned, pin_to_primary, read_from, read_routing,
+                          reading_replica)
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework import filters, mixins
 from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from .cache import (changed_since, current_versions, get_cache, object_key,
+                    request_key, scope_key)
 from .permissions import AdminCreateDeleteOrReadOnly
 
 
+class ConditionalResponseMixin:
+    '''ETag и Last-Modified для list/retrieve.
+
+    Валидаторы строятся из хранимых отметок `updated_at`, поэтому
+    ответ 304 отдаётся без сериализации. Вьюсет возвращает пару
+    (время изменения, токен) из `get_list_validators` и
+    `get_object_validators`.
+    '''
+
+    def get_list_validators(self):
+        raise NotImplementedError
+
+    def get_object_validators(self):
+        raise NotImplementedError
+
+    def get_object(self):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_list_validators, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_object_validators, super().retrieve,
+            request, *args, **kwargs
+        )
+
+    def conditional_response(self, get_validators, handler,
+                             request, *args, **kwargs):
+        last_modified, token = get_validators()
+        if last_modified is None:
+            return handler(request, *args, **kwargs)
+        source = ':'.join((
+            str(token), last_modified.isoformat(), request.get_full_path(),
+            request.accepted_renderer.format,
+        ))
+        etag = f'"{hashlib.md5(source.encode()).hexdigest()}"'
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class ReplicaReadMixin:
+    '''Чтение безопасных запросов с реплики READ_REPLICA.
+
+    Решение принимается после аутентификации: пользователь, который
+    только что что-то записал, ещё REPLICA_PIN_SECONDS читает основную
+    базу и видит свои изменения, даже если реплика отстаёт. Запись
+    всегда идёт в основную базу (core.routers.ReplicaRouter).
+    '''
+
+    def dispatch(self, request, *args, **kwargs):
+        with read_routing():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replica = settings.READ_REPLICA
+        if (replica and request.method in SAFE_METHODS
+                and not is_pinned(request.user)):
+            read_from(replica)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (settings.READ_REPLICA and request.method not in SAFE_METHODS
+                and response.status_code < 400
+                and request.user.is_authenticated):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class NestedParentMixin:
+    '''Родительский объект вложенного маршрута — один запрос на запрос.
+
+    `get_parent_queryset` описывает цепочку из URL вместе с проверкой
+    согласованности (например, отзыв принадлежит произведению из URL).
+    Найденный объект хранится в запросе и общий для вьюсета,
+    сериализатора и пермишенов: они получают его через
+    `view.get_parent()`.
+    '''
+    parent_url_kwarg = None
+
+    def get_parent_queryset(self):
+        raise NotImplementedError
+
+    def get_parent(self):
+        parent = getattr(self.request, 'nested_parent', None)
+        if parent is None:
+            parent = get_object_or_404(
+                self.get_parent_queryset(),
+                pk=self.kwargs[self.parent_url_kwarg],
+            )
+            self.request.nested_parent = parent
+        return parent
+
+
+class CachedListMixin:
+    '''Кэш ответов list с точечной инвалидацией.
+
+    Запись хранит версии наборов `cache_scopes` и объектов из
+    `cache_object_scope`, от которых зависит ответ, и считается
+    устаревшей, как только любая из них изменится.
+    '''
+    cache_scopes = ()
+    cache_object_scope = None
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def list(self, request, *args, **kwargs):
+        keys = [scope_key(scope) for scope in self.get_cache_scopes()]
+        if self.cache_object_scope:
+            keys.append(scope_key(self.cache_object_scope))
+        return self.cached_response(
+            super().list, keys, request, *args, **kwargs
+        )
+
+    def response_dependencies(self, data):
+        if not self.cache_object_scope or 'results' not in data:
+            return []
+        return [
+            object_key(self.cache_object_scope, item['id'])
+            for item in data['results']
+        ]
+
+    def cached_response(self, handler, keys, request, *args, **kwargs):
+        timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout:
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = request_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            if current_versions(entry['versions']) == entry['versions']:
+                return self.cached_entry_response(request, entry)
+        versions = current_versions(keys)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            versions.update(current_versions(
+                self.response_dependencies(response.data)
+            ))
+            if self.may_be_stale(versions):
+                return response
+            cache.set(key, {
+                'data': response.data,
+                'versions': versions,
+                'headers': {
+                    header: response[header]
+                    for header in ('ETag', 'Last-Modified')
+                    if response.has_header(header)
+                },
+            }, timeout)
+        return response
+
+    @staticmethod
+    def may_be_stale(versions):
+        '''Ответ прочитан с реплики, которая могла не получить запись.
+
+        Записи с новыми версиями, собранные по отстающей реплике, отдавались
+        бы всем, в том числе автору изменения, пока версии не сменятся.
+        '''
+        return reading_replica() and changed_since(
+            versions, time.time() - settings.REPLICA_PIN_SECONDS
+        )
+
+    @staticmethod
+    def cached_entry_response(request, entry):
+        headers = entry['headers']
+        response = None
+        if 'ETag' in headers:
+            response = get_conditional_response(
+                request, etag=headers['ETag'],
+                last_modified=parse_http_date_safe(headers['Last-Modified']),
+            )
+        if response is None:
+            response = Response(entry['data'])
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+    '''Кэш ответов list и retrieve.'''
+
+    def retrieve(self, request, *args, **kwargs):
+        keys = [scope_key(scope) for scope in self.get_cache_scopes()]
+        keys.append(object_key(
+            self.cache_object_scope, self.kwargs[self.lookup_field]
+        ))
+        return self.cached_response(
+            super().retrieve, keys, request, *args, **kwargs
+        )
+
+
 class ListCreateDestroyViewSet(mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                mixins.ListModelMixin,
@@ -12,7 +229,8 @@ class ListCreateDestroyViewSet(mixins.CreateModelMixin,
     pass
 
 
-class AdminControlSlugViewSet(ListCreateDestroyViewSet):
+class AdminControlSlugViewSet(ReplicaReadMixin, CachedListMixin,
+                              ListCreateDestroyViewSet):
     '''Общий родительский класс для категорий и жанров.'''
     filter_backends = [filters.SearchFilter]
     search_fields = ('=name', )
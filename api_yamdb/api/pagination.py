@@ -0,0 +1,45 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetPagination(CursorPagination):
+    '''Курсорная пагинация с размером страницы из параметра limit.'''
+    page_size_query_param = 'limit'
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    '''Limit/offset по умолчанию, курсор — по параметру cursor.
+
+    Клиент включает курсорный режим, передав `?cursor=` (для первой
+    страницы значение пустое). Порядок задаёт `cursor_ordering` вьюсета
+    или его фильтр сортировки; поля должны быть покрыты индексом.
+
+    count в режиме limit/offset вьюсет может отдать без COUNT по таблице
+    из `get_pagination_count(queryset)`, например из поддерживаемого
+    счётчика; None означает обычный COUNT.
+    '''
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        self.view = view
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = KeysetPagination()
+        self.keyset.cursor_query_param = self.cursor_query_param
+        self.keyset.ordering = getattr(view, 'cursor_ordering', None)
+        return self.keyset.paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        get_pagination_count = getattr(
+            self.view, 'get_pagination_count', None
+        )
+        if get_pagination_count is not None:
+            count = get_pagination_count(queryset)
+            if count is not None:
+                return count
+        return super().get_count(queryset)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,9 +1,17 @@
+from operator import attrgetter
+
+from core.instrumentation import timed
 from django.conf import settings
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.shortcuts import get_object_or_404
-from rest_framework import serializers
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.encoding import smart_str
+from rest_framework import ISO_8601, serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.settings import api_settings
 from reviews.models import Category, Comment, Genre, Review, Title, User
 from reviews.validators import validate_username
 
@@ -17,21 +25,168 @@ class MetaSlug:
     }
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class TimedRepresentationMixin:
+    '''Учитывает сериализацию в метриках запроса (serialize).'''
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+# Поля, чей to_representation сводится к приведению типа.
+PLAIN_REPRESENTATIONS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+}
+
+
+def compile_source(source_attrs):
+    '''instance -> значение source поля, как в Field.get_attribute.'''
+    if not source_attrs:
+        return lambda instance: instance
+    get = attrgetter('.'.join(source_attrs))
+
+    def source(instance):
+        try:
+            return get(instance)
+        except ObjectDoesNotExist:
+            return None
+    return source
+
+
+def compile_datetime(field):
+    '''DateTimeField.to_representation с часовым поясом, найденным
+    один раз, а не на каждое значение.'''
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = getattr(field, 'timezone', field.default_timezone())
+    if (output_format is None or output_format.lower() != ISO_8601
+            or field_timezone is None):
+        return field.to_representation
+
+    def represent(value):
+        if isinstance(value, str) or timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return represent
+
+
+def compile_field(field):
+    '''instance -> представление поля без обхода DRF на каждой строке.'''
+    get = compile_source(field.source_attrs)
+    if isinstance(field, serializers.ListSerializer):
+        child = compile_serializer(field.child)
+
+        def represent(value):
+            if isinstance(value, models.Manager):
+                value = value.all()
+            return [child(item) for item in value]
+    elif isinstance(field, serializers.Serializer):
+        represent = compile_serializer(field)
+    elif isinstance(field, serializers.SlugRelatedField):
+        represent = attrgetter(field.slug_field)
+    elif type(field) is serializers.DateTimeField:
+        represent = compile_datetime(field)
+    else:
+        represent = PLAIN_REPRESENTATIONS.get(
+            type(field).to_representation, field.to_representation
+        )
+
+    def value(instance):
+        attribute = get(instance)
+        return None if attribute is None else represent(attribute)
+    return value
+
+
+def compile_serializer(serializer):
+    fields = [
+        (field.field_name, compile_field(field))
+        for field in serializer._readable_fields
+    ]
+
+    def represent(instance):
+        return {name: value(instance) for name, value in fields}
+    return represent
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    '''Быстрое чтение списков.
+
+    Поля дочернего сериализатора один раз на список компилируются
+    в функции доступа, и строки собираются без вызова DRF для каждого
+    поля каждой строки. JSON совпадает с обычным ListSerializer.
+    '''
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        with timed('serialize'):
+            represent = compile_serializer(self.child)
+            return [represent(item) for item in data]
+
+
+class CategorySerializer(TimedRepresentationMixin,
+                         serializers.ModelSerializer):
     '''Сериализатор для категорий.'''
     class Meta(MetaSlug):
         model = Category
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     '''Сериализатор для жанров.'''
     class Meta(MetaSlug):
         model = Genre
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    '''Сериализатор для title.'''
-    genre = serializers.SlugRelatedField(
+class ManySlugRelatedField(serializers.ManyRelatedField):
+    '''Список слагов, разрешаемый одним запросом.
+
+    Ошибки те же, что у SlugRelatedField(many=True): о первом
+    неизвестном элементе.
+    '''
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        # Поле-слаг приводит значение к строке так же, как get(slug=...).
+        slugs = [smart_str(item) for item in data]
+        found = {
+            smart_str(getattr(obj, child.slug_field)): obj
+            for obj in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': set(slugs)}
+            )
+        }
+        for slug in slugs:
+            if slug not in found:
+                child.fail('does_not_exist', slug_name=child.slug_field,
+                           value=slug)
+        return [found[slug] for slug in slugs]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    '''SlugRelatedField, который с many=True читает все слаги разом.'''
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ManySlugRelatedField(**list_kwargs)
+
+
+class TitleSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    '''Сериализатор для title.
+
+    Жанры записываются разницей с текущими (Title.set_genres), а не
+    очисткой и повторной вставкой всей связи.
+    '''
+    genre = BulkSlugRelatedField(
         slug_field='slug', many=True, queryset=Genre.objects.all()
     )
     category = serializers.SlugRelatedField(
@@ -45,25 +200,58 @@ class TitleSerializer(serializers.ModelSerializer):
             raise ValidationError('некорректная дата')
         return year
 
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        with transaction.atomic():
+            title = super().create(validated_data)
+            title.set_genres(genres, is_new=True)
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        with transaction.atomic():
+            title = super().update(instance, validated_data)
+            if genres is not None:
+                title.set_genres(genres)
+        return title
+
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'genre', 'category', 'name', 'year', 'description')
 
 
-class ListRetrieveTitleSerializer(serializers.ModelSerializer):
-    '''Сериализатор для модели title (list, retrieve).'''
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
+class TitleStatsSerializer(serializers.Serializer):
+    '''Статистика оценок: число отзывов, сумма и гистограмма 1..10.'''
+    count = serializers.IntegerField(source='reviews_count')
+    sum = serializers.IntegerField(source='score_sum')
+    histogram = serializers.ListField(
+        source='stats.histogram', child=serializers.IntegerField()
     )
+
+
+class ListRetrieveTitleSerializer(TimedRepresentationMixin,
+                                  serializers.ModelSerializer):
+    '''Сериализатор для модели title (list, retrieve).'''
+    rating = serializers.IntegerField(read_only=True)
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
+    stats = TitleStatsSerializer(source='*', read_only=True)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('include_stats'):
+            self.fields.pop('stats')
 
     class Meta:
         model = Title
-        fields = '__all__'
+        list_serializer_class = CompiledListSerializer
+        fields = (
+            'id', 'rating', 'genre', 'category', 'name', 'year',
+            'description', 'stats'
+        )
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     '''Сериализатор для юзера.'''
 
     class Meta:
@@ -103,7 +291,8 @@ class TokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField()
 
 
-class CommentsSerializer(serializers.ModelSerializer):
+class CommentsSerializer(TimedRepresentationMixin,
+                         serializers.ModelSerializer):
     '''Сериализатор для модели.'''
     author = serializers.SlugRelatedField(
         read_only=True,
@@ -112,6 +301,7 @@ class CommentsSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
+        list_serializer_class = CompiledListSerializer
         fields = (
             'id',
             'text',
@@ -120,7 +310,25 @@ class CommentsSerializer(serializers.ModelSerializer):
         )
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class CommentBatchItemSerializer(serializers.ModelSerializer):
+    '''Комментарий в пакетной загрузке: отзыв передаётся по id.'''
+    review = serializers.IntegerField(source='review_id')
+
+    class Meta:
+        model = Comment
+        fields = ('review', 'text')
+
+
+class ReviewBatchItemSerializer(serializers.ModelSerializer):
+    '''Отзыв в пакетной загрузке: произведение передаётся по id.'''
+    title = serializers.IntegerField(source='title_id')
+
+    class Meta:
+        model = Review
+        fields = ('title', 'text', 'score')
+
+
+class ReviewSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     '''Сериализатор для отзывов.'''
     author = serializers.SlugRelatedField(
         read_only=True,
@@ -128,16 +336,14 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if request.method == 'POST':
-            if Review.objects.filter(title=title, author=author).exists():
+        if self.context['request'].method == 'POST':
+            title = self.context['view'].get_parent()
+            if title.reviewed_by_user:
                 raise ValidationError('На произведение можно оставить'
                                       'один отзыв.')
         return data
 
     class Meta:
         model = Review
+        list_serializer_class = CompiledListSerializer
         fields = ('id', 'text', 'author', 'score', 'pub_date')
@@ -0,0 +1,46 @@
+from api.authentication import forget_user
+from api.cache import invalidate, object_key, scope_key
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, Review, Title, User
+
+
+@receiver([post_save, post_delete], sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate(scope_key('titles'), object_key('titles', instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate(scope_key('titles'), object_key('titles', instance.pk))
+        return
+    # Изменение со стороны жанра: clear не сообщает затронутые произведения.
+    invalidate(scope_key('titles'), scope_key('genres'), *(
+        object_key('titles', pk) for pk in pk_set or ()
+    ))
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_review_title(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг, а с ним и порядок списков с ?ordering=rating.
+    invalidate(object_key('titles', instance.title_id),
+               scope_key('title_ratings'))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_categories(sender, instance, **kwargs):
+    invalidate(scope_key('categories'))
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def invalidate_genres(sender, instance, **kwargs):
+    invalidate(scope_key('genres'))
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_user_stamp(sender, instance, **kwargs):
+    forget_user(instance.pk)
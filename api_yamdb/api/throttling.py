@@ -0,0 +1,118 @@
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+# Сколько счётчиков прошлых окон хранить в памяти процесса.
+PREVIOUS_COUNTS_LIMIT = 10000
+
+# Чтение каталога: произведения, отзывы, комментарии, категории, жанры.
+CATALOGUE_SCOPES = {'list': 'catalogue', 'retrieve': 'catalogue'}
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    '''Скользящее окно по счётчикам фиксированных окон в общем кэше.
+
+    Число запросов за последние `duration` секунд оценивается как
+    счётчик текущего окна плюс счётчик предыдущего, умноженный на долю
+    его перекрытия со скользящим окном. Текущий счётчик увеличивается
+    атомарным `incr` — один поход в кэш на запрос, одинаковый для всех
+    воркеров. Предыдущее окно уже закрыто, поэтому его счётчик читается
+    один раз за окно и запоминается в процессе. Отклонённые запросы
+    тоже учитываются: клиент, который продолжает долбить, остаётся
+    ограниченным. Запрос расходует `view.get_throttle_cost(request)`
+    единиц лимита (по умолчанию одну): пакет — по единице на элемент,
+    отклонённый пакет — одну.
+    '''
+    previous_counts = {}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        window = int(window)
+        cost = self.get_cost(request, view)
+        current = self.increment(self.window_key(window), cost)
+        self.overlap = 1 - offset / self.duration
+        estimate = current + self.previous_count(window) * self.overlap
+        if estimate > self.num_requests:
+            if cost > 1:
+                # Отклонённый пакет считается одним запросом.
+                self.cache.decr(self.window_key(window), cost - 1)
+            self.remaining = self.duration - offset
+            return self.throttle_failure()
+        return True
+
+    def window_key(self, window):
+        return f'{self.key}:{window}'
+
+    @staticmethod
+    def get_cost(request, view):
+        get_throttle_cost = getattr(view, 'get_throttle_cost', None)
+        return 1 if get_throttle_cost is None else get_throttle_cost(request)
+
+    def increment(self, key, cost=1):
+        try:
+            return self.cache.incr(key, cost)
+        except ValueError:
+            # Первый запрос окна; ключ живёт и как предыдущее окно.
+            if self.cache.add(key, cost, 2 * self.duration):
+                return cost
+            return self.cache.incr(key, cost)
+
+    def previous_count(self, window):
+        known = self.previous_counts.get(self.key)
+        if known is not None and known[0] == window:
+            return known[1]
+        count = self.cache.get(self.window_key(window - 1), 0)
+        if len(self.previous_counts) >= PREVIOUS_COUNTS_LIMIT:
+            self.previous_counts.clear()
+        self.previous_counts[self.key] = (window, count)
+        return count
+
+    def wait(self):
+        return self.remaining
+
+
+class ScopedThrottle(SlidingWindowThrottle):
+    '''Бюджет запросов по области вьюсета.
+
+    Область задаёт `throttle_scopes` (по действию вьюсета) или
+    `throttle_scope`; лимиты — DEFAULT_THROTTLE_RATES. Счётчик ведётся
+    на пользователя, для анонимов — на IP-адрес.
+    '''
+
+    def __init__(self):
+        # Лимит зависит от вьюсета и определяется в allow_request.
+        pass
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scopes', {}).get(
+            getattr(view, 'action', None),
+            getattr(view, 'throttle_scope', None),
+        )
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(view)
+        self.rate = self.get_rate() if self.scope else None
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AuthThrottle(ScopedThrottle):
+    '''Регистрация и выдача токена: строгий лимит на IP-адрес.'''
+
+    def get_scope(self, view):
+        return 'auth'
@@ -1,6 +1,9 @@
-from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet, get_jwt_token,
-                       register)
+from api.async_views import asyncify_routes
+from api.views import (CategoryViewSet, CommentBatchView, CommentExportView,
+                       CommentViewSet, GenreViewSet, ReviewBatchView,
+                       ReviewExportView, ReviewViewSet, TitleExportView,
+                       TitleViewSet, UserViewSet, get_jwt_token, register)
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 
@@ -23,8 +26,22 @@ router_v1.register(
     ReviewViewSet,
     basename='reviews')
 
+router_urls = router_v1.urls
+if settings.SERVER_MODE == 'asgi':
+    router_urls = asyncify_routes(router_urls)
+
 urlpatterns = [
-    path('', include(router_v1.urls)),
+    path('', include(router_urls)),
     path(f'{V1_PATH}auth/signup/', register, name='register'),
-    path(f'{V1_PATH}auth/token/', get_jwt_token, name='token')
+    path(f'{V1_PATH}auth/token/', get_jwt_token, name='token'),
+    path(f'{V1_PATH}reviews/batch/', ReviewBatchView.as_view(),
+         name='reviews-batch'),
+    path(f'{V1_PATH}comments/batch/', CommentBatchView.as_view(),
+         name='comments-batch'),
+    path(f'{V1_PATH}export/titles/', TitleExportView.as_view(),
+         name='export-titles'),
+    path(f'{V1_PATH}export/reviews/', ReviewExportView.as_view(),
+         name='export-reviews'),
+    path(f'{V1_PATH}export/comments/', CommentExportView.as_view(),
+         name='export-comments'),
 ]
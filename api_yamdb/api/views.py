@@ -1,27 +1,39 @@
-from api.filters import TitleFilter
-from api.mixins import AdminControlSlugViewSet
+from api.authentication import issue_access_token
+from api.batch import BatchCreateView, failure
+from api.cache import invalidate, object_key, scope_key
+from api.export import ExportView
+from api.filters import StoredFieldOrderingFilter, TitleFilter
+from api.mixins import (AdminControlSlugViewSet, CachedListRetrieveMixin,
+                        ConditionalResponseMixin, NestedParentMixin,
+                        ReplicaReadMixin)
+from api.pagination import LimitOffsetOrCursorPagination
 from api.permissions import AdminOnly, AdminOrReadOnly, IsAuthorOrModerOrAdmin
-from api.serializers import (CategorySerializer, CommentsSerializer,
-                             GenreSerializer, ListRetrieveTitleSerializer,
-                             RegisterDataSerializer, ReviewSerializer,
-                             TitleSerializer, TokenSerializer, UserSerializer)
+from api.serializers import (CategorySerializer, CommentBatchItemSerializer,
+                             CommentsSerializer, GenreSerializer,
+                             ListRetrieveTitleSerializer,
+                             RegisterDataSerializer, ReviewBatchItemSerializer,
+                             ReviewSerializer, TitleSerializer,
+                             TokenSerializer, UserSerializer)
+from api.throttling import CATALOGUE_SCOPES, AuthThrottle
+from core.models import Counter, OutboxMessage
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.db import IntegrityError
-from django.db.models import Avg
+from django.db.models import Count, Exists, Max, OuterRef
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleStats, User)
 
 
 @api_view(['POST'])
+@throttle_classes([AuthThrottle])
 def register(request):
     '''Регистрация пользователя.'''
     serializer = RegisterDataSerializer(data=request.data)
@@ -33,7 +45,7 @@ def register(request):
     except IntegrityError:
         raise ValidationError("Неверное имя пользователя или email")
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    OutboxMessage.objects.enqueue(
         subject='YaMDb registration',
         message=f'Your confirmation code: {confirmation_code}',
         from_email=None,
@@ -45,6 +57,7 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthThrottle])
 def get_jwt_token(request):
     '''Получение токена.'''
     serializer = TokenSerializer(data=request.data)
@@ -57,7 +70,7 @@ def get_jwt_token(request):
     if default_token_generator.check_token(
         user, serializer.validated_data['confirmation_code']
     ):
-        token = AccessToken.for_user(user)
+        token = issue_access_token(user)
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -83,8 +96,10 @@ class UserViewSet(ModelViewSet):
         permission_classes=[permissions.IsAuthenticated],
     )
     def users_own_profile(self, request):
+        # В request.user только поля доступа из токена.
+        user = get_object_or_404(User, pk=request.user.pk)
         serializer = UserSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
@@ -100,25 +115,91 @@ class CategoryViewSet(AdminControlSlugViewSet):
     '''Набор для категорий.'''
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_scopes = ('categories',)
+    throttle_scopes = CATALOGUE_SCOPES
 
 
 class GenreViewSet(AdminControlSlugViewSet):
     '''Набор для жанров.'''
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_scopes = ('genres',)
+    throttle_scopes = CATALOGUE_SCOPES
 
 
-class TitleViewSet(ModelViewSet):
+class TitleViewSet(ReplicaReadMixin, CachedListRetrieveMixin,
+                   ConditionalResponseMixin, ModelViewSet):
     queryset = (
-        Title.objects.all().annotate(Avg('reviews__score')).order_by('name')
+        Title.objects.select_related('category')
+        .prefetch_related('genre').order_by('name')
     )
 
     permission_classes = (AdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    throttle_scopes = CATALOGUE_SCOPES
+    cache_scopes = ('categories', 'genres')
+    cache_object_scope = 'titles'
 
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, StoredFieldOrderingFilter)
     filterset_fields = ('name', 'year', 'category', 'genre',)
     filterset_class = TitleFilter
+    ordering_fields = ('name', 'year', 'rating', 'reviews_count', 'ranking')
+    ordering = ('name', 'id')
+    # Порядок по этим полям меняется с каждым отзывом.
+    rating_ordering_fields = ('rating', 'reviews_count', 'ranking')
+
+    def get_cache_scopes(self):
+        ordering = self.request.query_params.get('ordering', '')
+        if any(term.strip().lstrip('-') in self.rating_ordering_fields
+               for term in ordering.split(',')):
+            return (*self.cache_scopes, 'title_ratings')
+        return self.cache_scopes
+
+    def get_list_validators(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        count = None
+        if not queryset.query.where:
+            # Весь каталог: число произведений ведёт счётчик.
+            count = Counter.objects.value(Title.COUNTER)
+        if count is None:
+            state = queryset.aggregate(
+                last_modified=Max('updated_at'), count=Count('pk')
+            )
+            count = state['count']
+        else:
+            state = queryset.aggregate(last_modified=Max('updated_at'))
+        # Тот же filter_queryset, что и у страницы: пагинация не
+        # считает строки повторно.
+        self.list_count = count
+        return state['last_modified'], count
+
+    def get_pagination_count(self, queryset):
+        return getattr(self, 'list_count', None)
+
+    def get_object_validators(self):
+        state = Title.objects.filter(pk=self.kwargs['pk']).values_list(
+            'updated_at', flat=True
+        )
+        return next(iter(state), None), self.kwargs['pk']
+
+    def include_stats(self):
+        '''Статистика оценок: в карточке всегда, в списке — по запросу.'''
+        if self.action == 'retrieve':
+            return True
+        include = self.request.query_params.get('include', '')
+        return self.action == 'list' and 'stats' in include.split(',')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_stats():
+            queryset = queryset.select_related('stats')
+        return queryset
+
+    def get_serializer_context(self):
+        return {
+            **super().get_serializer_context(),
+            'include_stats': self.include_stats(),
+        }
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
@@ -126,33 +207,172 @@ class TitleViewSet(ModelViewSet):
         return TitleSerializer
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, NestedParentMixin,
+                     ConditionalResponseMixin, ModelViewSet):
     '''Вьюсет для комментариев.'''
     serializer_class = CommentsSerializer
     permission_classes = (IsAuthorOrModerOrAdmin,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    throttle_scopes = {**CATALOGUE_SCOPES, 'create': 'comments'}
+    cursor_ordering = ('-pub_date', '-id')
+    parent_url_kwarg = 'review_id'
+
+    def get_parent_queryset(self):
+        return Review.objects.filter(title_id=self.kwargs['title_id'])
 
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
-        return review.comments.all()
+        return self.get_parent().comments.select_related('author')
+
+    def get_list_validators(self):
+        return self.get_parent().updated_at, ''
+
+    def get_pagination_count(self, queryset):
+        return self.get_parent().comments_count
+
+    def get_object_validators(self):
+        return self.get_parent().updated_at, self.kwargs['pk']
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_parent())
 
 
-class ReviewViewSet(ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, NestedParentMixin,
+                    ConditionalResponseMixin, ModelViewSet):
     '''Вьюсет для отзывов.'''
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorOrModerOrAdmin,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    throttle_scopes = {**CATALOGUE_SCOPES, 'create': 'reviews'}
+    cursor_ordering = ('-pub_date', '-id')
+    parent_url_kwarg = 'title_id'
+
+    def get_parent_queryset(self):
+        queryset = Title.objects.only('id', 'updated_at', 'reviews_count')
+        user = self.request.user
+        if self.action == 'create' and user.is_authenticated:
+            # Проверка «один отзыв на произведение» в том же запросе.
+            queryset = queryset.annotate(reviewed_by_user=Exists(
+                Review.objects.filter(title=OuterRef('pk'), author=user)
+            ))
+        return queryset
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs['title_id']
+        ).select_related('author')
+
+    def get_list_validators(self):
+        return self.get_parent().updated_at, ''
+
+    def get_pagination_count(self, queryset):
+        return self.get_parent().reviews_count
+
+    def get_object_validators(self):
+        review = self.get_object()
+        return review.updated_at, review.pk
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_parent())
+
+
+class ReviewBatchView(BatchCreateView):
+    '''Пакетная загрузка отзывов: {"items": [{title, text, score}]}.'''
+    model = Review
+    parent_model = Title
+    parent_field = 'title'
+    throttle_scope = 'reviews'
+    item_serializer_class = ReviewBatchItemSerializer
+    serializer_class = ReviewSerializer
+
+    def check_items(self, valid):
+        rejected = super().check_items(valid)
+        reviewed = set(Review.objects.filter(
+            author=self.request.user,
+            title_id__in={data['title_id'] for data in valid.values()},
+        ).values_list('title_id', flat=True))
+        for index, data in valid.items():
+            if index in rejected:
+                continue
+            if data['title_id'] in reviewed:
+                rejected[index] = failure(status.HTTP_409_CONFLICT, {
+                    'title': ['На произведение можно оставить один отзыв.']
+                })
+            reviewed.add(data['title_id'])
+        return rejected
+
+    def after_create(self, instances):
+        title_ids = {review.title_id for review in instances}
+        Title.objects.filter(pk__in=title_ids).recalculate_rating()
+        TitleStats.objects.filter(title_id__in=title_ids).recalculate()
+        invalidate(scope_key('title_ratings'), *(
+            object_key('titles', pk) for pk in title_ids
+        ))
+
+
+class CommentBatchView(BatchCreateView):
+    '''Пакетная загрузка комментариев: {"items": [{review, text}]}.'''
+    model = Comment
+    parent_model = Review
+    parent_field = 'review'
+    throttle_scope = 'comments'
+    item_serializer_class = CommentBatchItemSerializer
+    serializer_class = CommentsSerializer
+
+    def after_create(self, instances):
+        reviews = Review.objects.filter(
+            pk__in={comment.review_id for comment in instances}
+        )
+        reviews.recalculate_comments_count()
+        reviews.update(updated_at=timezone.now())
+
+
+class TitleExportView(ExportView):
+    '''Выгрузка произведений с жанрами, категорией и рейтингом.'''
+    columns = ('id', 'name', 'year', 'description', 'category', 'genres',
+               'rating', 'reviews_count', 'updated_at')
+    renamed = {'category__slug': 'category'}
+
+    def get_queryset(self):
+        return Title.objects.values(
+            'id', 'name', 'year', 'description', 'rating', 'reviews_count',
+            'updated_at', 'category__slug',
+        )
+
+    def chunks(self, rows):
+        # prefetch_related с iterator() не работает: жанры пачки
+        # читаются одним запросом.
+        through = Title.genre.through
+        for chunk in super().chunks(rows):
+            genres = {row['id']: [] for row in chunk}
+            for title_id, slug in through.objects.filter(
+                title_id__in=genres
+            ).values_list('title_id', 'genre__slug'):
+                genres[title_id].append(slug)
+            for row in chunk:
+                row['genres'] = genres[row['id']]
+            yield chunk
+
+
+class ReviewExportView(ExportView):
+    '''Выгрузка отзывов.'''
+    columns = ('id', 'title_id', 'author', 'text', 'score', 'pub_date',
+               'updated_at')
+    renamed = {'author__username': 'author'}
+
+    def get_queryset(self):
+        return Review.objects.values(
+            'id', 'title_id', 'text', 'score', 'pub_date', 'updated_at',
+            'author__username',
+        )
+
+
+class CommentExportView(ExportView):
+    '''Выгрузка комментариев.'''
+    columns = ('id', 'review_id', 'author', 'text', 'pub_date', 'updated_at')
+    renamed = {'author__username': 'author'}
+
+    def get_queryset(self):
+        return Comment.objects.values(
+            'id', 'review_id', 'text', 'pub_date', 'updated_at',
+            'author__username',
+        )
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,11 +74,104 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # Django 3.2 не знает этот ключ, его читает core.db.
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True',
     }
 }
 
 
+# Кэш: LocMemCache для разработки и тестов, в проде Redis
+# (CACHE_BACKEND=django_redis.cache.RedisCache, CACHE_LOCATION=redis://...).
+# LocMemCache у каждого процесса свой: лимиты запросов (api.throttling)
+# общие для воркеров только с Redis, docker-compose задаёт его для web.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', default=10000)),
+        },
+    }
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=60))
+
+
+# Инструментирование запросов: заголовок Server-Timing и бюджет SQL-запросов
+
+SERVER_TIMING = os.getenv('SERVER_TIMING', default=False) == 'True'
+REQUEST_QUERY_BUDGET = int(os.getenv('REQUEST_QUERY_BUDGET', default=20))
+
+
+# Режим сервера: wsgi или asgi (горячие GET-эндпоинты становятся async)
+
+SERVER_MODE = os.getenv('SERVER_MODE', default='wsgi')
+
+
+# Пул соединений с PostgreSQL, общий для потоков процесса (DB_POOL=True).
+# Под ASGI вьюхи работают в пуле потоков asgiref, и без пула постоянное
+# соединение держит каждый поток.
+
+if (os.getenv('DB_POOL', default='False') == 'True'
+        and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'):
+    DATABASES['default'].update({
+        'ENGINE': 'core.backends.postgresql',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', default=1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', default=4)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', default=30)),
+        }},
+    })
+
+
+# Реплика для чтения (DB_REPLICA_HOST): GET к произведениям, отзывам и
+# комментариям читаются с неё, автор записи ещё REPLICA_PIN_SECONDS секунд
+# читает основную базу. Окно должно быть больше задержки репликации.
+
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+READ_REPLICA = 'replica' if 'replica' in DATABASES else None
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', default=5))
+
+
+# Полнотекстовый поиск по произведениям (конфигурация PostgreSQL)
+
+TITLE_SEARCH_CONFIG = os.getenv('TITLE_SEARCH_CONFIG', default='russian')
+
+
+# Байесовская оценка для сортировки ?ordering=ranking:
+# (WEIGHT * MEAN + сумма оценок) / (WEIGHT + число отзывов).
+# После изменения выполните manage.py recalculate_ratings.
+
+RATING_PRIOR_MEAN = float(os.getenv('RATING_PRIOR_MEAN', default=6.0))
+RATING_PRIOR_WEIGHT = int(os.getenv('RATING_PRIOR_WEIGHT', default=10))
+
+
+# Пакетная загрузка /reviews/batch/ и /comments/batch/: элементов за запрос
+
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', default=100))
+
+
+# Потоковая выгрузка /export/: строк на чтение серверного курсора и запись
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', default=2000))
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -112,7 +206,7 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 
 STATIC_URL = '/static/'
-# STATIC_DATA = (BASE_DIR / 'static/data/')
+STATIC_DATA = BASE_DIR / 'static' / 'data'
 # STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
@@ -124,13 +218,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # Лимиты по областям в общем кэше (пустое значение - без лимита)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.ScopedThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': os.getenv('THROTTLE_AUTH_RATE', default='10/min') or None,
+        'reviews': os.getenv('THROTTLE_REVIEWS_RATE', default='30/hour') or None,
+        'comments': os.getenv('THROTTLE_COMMENTS_RATE', default='120/hour') or None,
+        'catalogue': os.getenv('THROTTLE_CATALOGUE_RATE', default='1200/min') or None,
+    },
+    # IP клиента - последний адрес X-Forwarded-For, его ставит nginx
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
 }
 
 SIMPLE_JWT = {
@@ -138,6 +244,9 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Сколько секунд доверять роли из токена без сверки с базой
+AUTH_STAMP_CACHE_TIMEOUT = int(os.getenv('AUTH_STAMP_CACHE_TIMEOUT', default=300))
+
 
 AUTH_USER_MODEL = 'reviews.User'
 
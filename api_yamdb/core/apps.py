@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core.db import install_health_checks, schedule_health_checks
+        from core.instrumentation import install_query_recorder
+        connection_created.connect(install_query_recorder)
+        install_health_checks()
+        request_started.connect(schedule_health_checks)
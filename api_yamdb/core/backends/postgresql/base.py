@@ -0,0 +1,124 @@
+"""PostgreSQL backend with an in-process connection pool.
+
+Django 3.2 has no connection pool (it appears in Django 5.1), so this
+backend keeps psycopg2 connections in a per-process pool configured the
+same way: OPTIONS={'pool': {'min_size': ..., 'max_size': ...,
+'timeout': ...}}. Closing the Django connection at the end of a request
+returns it to the pool; the next checkout is health-checked when
+CONN_HEALTH_CHECKS is on. Unlike per-thread CONN_MAX_AGE connections, the
+pool bounds how many connections a process holds, which matters under
+ASGI where views run in the asgiref thread pool.
+"""
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from psycopg2 import pool as psycopg2_pool
+from psycopg2.extras import register_default_jsonb
+
+POOL_DEFAULTS = {'min_size': 1, 'max_size': 4, 'timeout': 30.0}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(psycopg2_pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that waits for a free connection.
+
+    psycopg2 raises PoolError as soon as max_size connections are in use;
+    here getconn() blocks for up to timeout seconds first.
+    """
+
+    def __init__(self, min_size, max_size, timeout, **conn_params):
+        super().__init__(min_size, max_size, **conn_params)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise psycopg2_pool.PoolError(
+                f'No free connection in the pool after {self.timeout}s'
+            )
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool_options(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options:
+            return None
+        if self.settings_dict['CONN_MAX_AGE']:
+            raise ImproperlyConfigured(
+                'Pooled connections require CONN_MAX_AGE = 0.'
+            )
+        return {**POOL_DEFAULTS, **(options if options is not True else {})}
+
+    @property
+    def pool(self):
+        """The pool of this alias in the current process (after fork too)."""
+        options = self.pool_options
+        if options is None:
+            return None
+        key = (self.alias, os.getpid())
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(
+                    **options, **self.get_connection_params()
+                )
+            return _pools[key]
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = self.checkout(pool)
+        # The same setup as the base backend does for a new connection.
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def checkout(self, pool):
+        """Take a connection, replacing ones the server has dropped."""
+        for _ in range(pool.maxconn):
+            connection = pool.getconn()
+            if not self.settings_dict.get('CONN_HEALTH_CHECKS'):
+                return connection
+            try:
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                return connection
+            except base.Database.Error:
+                pool.putconn(connection, close=True)
+        return pool.getconn()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # The pool rolls back an open transaction before reusing it.
+        with self.wrap_database_errors:
+            pool.putconn(self.connection, close=bool(self.connection.closed))
@@ -0,0 +1,37 @@
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+
+
+def schedule_health_checks(**kwargs):
+    """Ask this thread's connections to check themselves (CONN_HEALTH_CHECKS).
+
+    Django 3.2 reuses a CONN_MAX_AGE connection without checking it, so
+    the first query after a database restart fails. Like Django 4.1, the
+    check is lazy: the start of a request only sets a flag, and a
+    connection runs SELECT 1 once, when the request first uses it.
+    Aliases the request never touches are not pinged.
+    """
+    for connection in connections.all():
+        connection.health_check_done = False
+
+
+def close_if_health_check_failed(connection: BaseDatabaseWrapper) -> None:
+    """Close a reused connection that no longer works, once per request."""
+    if getattr(connection, 'health_check_done', True):
+        return
+    connection.health_check_done = True
+    if (connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not connection.is_usable()):
+        connection.close()
+
+
+def install_health_checks() -> None:
+    """Run the pending health check before a connection opens a cursor."""
+    cursor = BaseDatabaseWrapper._cursor
+
+    def _cursor(self, name=None):
+        close_if_health_check_failed(self)
+        return cursor(self, name)
+
+    BaseDatabaseWrapper._cursor = _cursor
@@ -0,0 +1,157 @@
+"""Per-request timings and an in-process Prometheus-style registry.
+
+Statistics of the current request live in a context variable, so SQL run
+by async views in asgiref's thread pool is attributed to the request too.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class RequestStats:
+    """Timings collected while one request is handled."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = 'unresolved'
+        self.queries = 0
+        self.db_time = 0.0
+        self.timings: Dict[str, float] = {}
+        self.active = set()
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self.started
+
+
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    'current_stats', default=None
+)
+
+
+@contextmanager
+def timed(name: str):
+    """Add the block's duration to the current request's timing name.
+
+    Nested blocks with the same name (a serializer inside a serializer)
+    are counted once.
+    """
+    stats = current_stats.get()
+    if stats is None or name in stats.active:
+        yield
+        return
+    stats.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.active.discard(name)
+        stats.timings[name] = (
+            stats.timings.get(name, 0.0) + time.perf_counter() - started
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting queries of the current request."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver: instrument every new connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class Histogram:
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series: Dict[Tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        with self.lock:
+            counts = self.series.setdefault(
+                labels, [0] * (len(self.buckets) + 1) + [0.0]
+            )
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def render(self, label_names: Tuple) -> str:
+        lines = [f'# HELP {self.name} {self.help_text}',
+                 f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = {key: list(value) for key, value in self.series.items()}
+        for labels, counts in sorted(series.items()):
+            base = ','.join(
+                f'{name}="{value}"' for name, value in zip(label_names, labels)
+            )
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts[:-1]):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{{base}}} {counts[-1]}')
+            lines.append(f'{self.name}_count{{{base}}} {cumulative}')
+        return '\n'.join(lines)
+
+
+LABELS = ('view', 'method')
+request_duration = Histogram(
+    'yamdb_request_duration_seconds', 'Total request time.', LATENCY_BUCKETS
+)
+db_duration = Histogram(
+    'yamdb_db_duration_seconds', 'Time spent in SQL per request.',
+    LATENCY_BUCKETS,
+)
+serialize_duration = Histogram(
+    'yamdb_serialize_duration_seconds',
+    'Time spent in serializers per request.', LATENCY_BUCKETS,
+)
+query_count = Histogram(
+    'yamdb_db_queries', 'SQL queries per request.', QUERY_BUCKETS
+)
+
+
+def observe(stats: RequestStats, method: str, total: float) -> None:
+    labels = (stats.view, method)
+    request_duration.observe(labels, total)
+    db_duration.observe(labels, stats.db_time)
+    serialize_duration.observe(labels, stats.timings.get('serialize', 0.0))
+    query_count.observe(labels, stats.queries)
+
+
+def render_samples(name: str, help_text: str, kind: str, label: str,
+                   samples: Dict[str, float]) -> str:
+    """Counter or gauge values that are computed at scrape time."""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+    lines.extend(
+        f'{name}{{{label}="{value}"}} {sample}'
+        for value, sample in sorted(samples.items())
+    )
+    return '\n'.join(lines) + '\n'
+
+
+def render_metrics() -> str:
+    return '\n'.join(
+        histogram.render(LABELS) for histogram in (
+            request_duration, db_duration, serialize_duration, query_count
+        )
+    ) + '\n'
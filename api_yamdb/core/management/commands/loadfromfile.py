@@ -1,25 +1,362 @@
 import csv
+import io
+import multiprocessing
 import os
-from typing import Any, List
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import (Any, Dict, Iterable, Iterator, List, NamedTuple, Optional,
+                    Set)
 
+from api.cache import invalidate, scope_key
+from core.workers import init_worker
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import IntegrityError
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, connections, transaction
+from django.utils import timezone
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleStats, User)
 
 model_by_filename = [
     ('category', Category),
     ('genre', Genre),
     ('titles', Title),
+    ('genre_title', Title.genre.through),
     ('users', User),
     ('review', Review),
     ('comments', Comment),
 ]
 
+# Наборы кэша ответов API, которые зависят от загружаемых таблиц.
+RESPONSE_SCOPES = ('categories', 'genres', 'titles', 'title_ratings')
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_PARTITION_ROWS = 100000
+COPY_NULL = r'\N'
+
+
+class LoadResult(NamedTuple):
+    rows: int
+    created: int
+    updated: int
+    skipped: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else float(self.rows)
+
+
+class Partition(NamedTuple):
+    filename: str
+    path: str
+    start: int
+    stop: Optional[int]
+
+    def __str__(self) -> str:
+        if self.start == 0 and self.stop is None:
+            return self.filename
+        return f'{self.filename} rows {self.start}-{self.stop}'
+
+
+def file_dependencies() -> Dict[str, Set[str]]:
+    """Files that must be loaded before each file, by foreign keys."""
+    filename_by_model = {model: name for name, model in model_by_filename}
+    return {
+        filename: {
+            filename_by_model[field.related_model]
+            for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model is not model
+            and field.related_model in filename_by_model
+        }
+        for filename, model in model_by_filename
+    }
+
+
+def count_rows(path: str) -> int:
+    with open(path, encoding='utf-8') as csvfile:
+        return sum(1 for _ in csv.DictReader(csvfile, delimiter=','))
+
+
+def load_partition(partition: Partition, batch_size: int,
+                   use_copy: bool) -> tuple:
+    """Load a row range of a file in a worker process."""
+    model = dict(model_by_filename)[partition.filename]
+    try:
+        result = Command.load_file(
+            model, partition.path, batch_size, use_copy,
+            start=partition.start, stop=partition.stop, run_post_load=False,
+        )
+    except (DatabaseError, ValueError) as error:
+        return partition, None, str(error)
+    return partition, result, None
+
+
+def batched(rows: Iterable[Dict[str, str]],
+            size: int) -> Iterator[List[Dict[str, str]]]:
+    """Split a row stream into lists of at most size rows."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def copy_buffer(rows: Iterable[List[Any]]) -> io.StringIO:
+    """Render rows as csv for COPY with NULL written as COPY_NULL."""
+    buffer = io.StringIO()
+    # В формате csv COPY читает "" как пустую строку, а не NULL,
+    # поэтому None передаётся явным маркером из COPY ... NULL.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
+    for row in rows:
+        writer.writerow(
+            [COPY_NULL if value is None else value for value in row]
+        )
+    buffer.seek(0)
+    return buffer
+
+
+class BulkFileLoader:
+    """Load one csv file into a model table in batches."""
+
+    def __init__(self, model: Any, keys: List[str], use_copy: bool) -> None:
+        self.model = model
+        self.keys = keys
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.pk_name = model._meta.pk.attname
+        # auto_now поля не приходят из csv, но отмечают и перезагрузку.
+        self.auto_now = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False) and field.attname not in keys
+        ]
+        self.relations = {
+            key: model._meta.get_field(key)
+            for key in keys if model._meta.get_field(key).is_relation
+        }
+        self.known_ids = {
+            key: set(field.related_model._default_manager
+                     .values_list('pk', flat=True))
+            for key, field in self.relations.items()
+        }
+
+    def prepare_row(self, row: Dict[str, str]) -> bool:
+        """Convert ids and check foreign keys against the id map."""
+        if self.pk_name in row:
+            row[self.pk_name] = int(row[self.pk_name])
+        for key, field in self.relations.items():
+            value = row[key]
+            if value == '' and field.null:
+                row[key] = None
+                continue
+            row[key] = int(value)
+            if row[key] not in self.known_ids[key]:
+                return False
+        return True
+
+    def load(self, rows: Iterable[Dict[str, str]],
+             batch_size: int) -> LoadResult:
+        """Insert or update all rows and return load statistics."""
+        started = time.monotonic()
+        total = created = updated = skipped = 0
+        if self.use_copy:
+            self.create_staging_table()
+        for batch in batched(rows, batch_size):
+            total += len(batch)
+            valid = [row for row in batch if self.prepare_row(row)]
+            skipped += len(batch) - len(valid)
+            if self.use_copy:
+                batch_created, batch_updated = self.copy_batch(valid)
+            else:
+                batch_created, batch_updated = self.bulk_batch(valid)
+            created += batch_created
+            updated += batch_updated
+        self.reset_sequence()
+        return LoadResult(
+            total, created, updated, skipped, time.monotonic() - started
+        )
+
+    def bulk_batch(self, rows: List[Dict[str, str]]) -> tuple:
+        """Upsert rows with one bulk_create and one bulk_update."""
+        manager = self.model._default_manager
+        if self.pk_name not in self.keys:
+            manager.bulk_create(self.model(**row) for row in rows)
+            return len(rows), 0
+        existing = set(manager.filter(
+            pk__in=[row[self.pk_name] for row in rows]
+        ).values_list('pk', flat=True))
+        new, changed = [], []
+        for row in rows:
+            instance = self.model(**row)
+            if instance.pk in existing:
+                changed.append(instance)
+            else:
+                new.append(instance)
+        manager.bulk_create(new)
+        fields = [key for key in self.keys if key != self.pk_name]
+        if changed and fields:
+            # bulk_update не вызывает pre_save, отметку ставим сами.
+            now = timezone.now()
+            for instance in changed:
+                for field in self.auto_now:
+                    setattr(instance, field.attname, now)
+            manager.bulk_update(
+                changed, fields + [field.name for field in self.auto_now]
+            )
+        return len(new), len(changed)
+
+    def missing_columns(self) -> Dict[str, Any]:
+        """Defaults for NOT NULL columns absent from the csv file."""
+        defaults = {}
+        for field in self.model._meta.concrete_fields:
+            if field.attname in self.keys or field.primary_key:
+                continue
+            if (getattr(field, 'auto_now', False)
+                    or getattr(field, 'auto_now_add', False)):
+                value = timezone.now()
+            else:
+                value = field.get_default()
+            defaults[field.column] = field.get_db_prep_save(value, connection)
+        return defaults
+
+    def create_staging_table(self) -> None:
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        self.defaults = self.missing_columns()
+        self.columns = [
+            self.model._meta.get_field(key).column for key in self.keys
+        ] + list(self.defaults)
+        # Перезагрузка меняет только колонки из csv и отметки auto_now:
+        # счётчики и рейтинг остаются прежними.
+        self.update_columns = [
+            self.model._meta.get_field(key).column
+            for key in self.keys if key != self.pk_name
+        ] + [field.column for field in self.auto_now]
+        with connection.cursor() as cursor:
+            # ON COMMIT DROP не срабатывает, если загрузка идёт внутри
+            # внешней транзакции (тесты, бенчмарки): таблица предыдущего
+            # файла ещё существует.
+            cursor.execute('DROP TABLE IF EXISTS loadfromfile_staging')
+            cursor.execute(
+                f'CREATE TEMP TABLE loadfromfile_staging '
+                f'(LIKE {table}) ON COMMIT DROP'
+            )
+
+    def copy_batch(self, rows: List[Dict[str, str]]) -> tuple:
+        """Upsert rows through COPY into a staging table."""
+        quote = connection.ops.quote_name
+        buffer = copy_buffer(
+            [row[key] for key in self.keys] + list(self.defaults.values())
+            for row in rows
+        )
+        columns = ', '.join(quote(column) for column in self.columns)
+        pk = quote(self.model._meta.pk.column)
+        if self.update_columns:
+            conflict = 'DO UPDATE SET ' + ', '.join(
+                f'{quote(column)} = EXCLUDED.{quote(column)}'
+                for column in self.update_columns
+            )
+        else:
+            conflict = 'DO NOTHING'
+        table = quote(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute('TRUNCATE loadfromfile_staging')
+            cursor.copy_expert(
+                f'COPY loadfromfile_staging ({columns}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+                buffer,
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM loadfromfile_staging '
+                f'ON CONFLICT ({pk}) {conflict} RETURNING (xmax = 0)'
+            )
+            inserted = sum(1 for (is_new,) in cursor.fetchall() if is_new)
+        return inserted, len(rows) - inserted
+
+    def reset_sequence(self) -> None:
+        """Move the id sequence past ids loaded explicitly from csv."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [self.model]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def merge_results(results: List[LoadResult]) -> LoadResult:
+    return LoadResult(
+        sum(result.rows for result in results),
+        sum(result.created for result in results),
+        sum(result.updated for result in results),
+        sum(result.skipped for result in results),
+        max((result.seconds for result in results), default=0.0),
+    )
+
+
+def refresh_ratings() -> None:
+    Title.objects.recalculate_rating()
+    TitleStats.objects.recalculate()
+
+
+def refresh_titles() -> None:
+    Title.objects.update_search_vector()
+    Title.objects.reset_counter()
+    TitleStats.objects.create_missing()
+
+
+def refresh_comments() -> None:
+    Review.objects.recalculate_comments_count()
+
+
+post_load = {
+    Title: refresh_titles,
+    Review: refresh_ratings,
+    Comment: refresh_comments,
+}
+
+
+def after_load(model: Any) -> None:
+    """Refresh derived data; bulk writes bypass the model signals."""
+    if model in post_load:
+        post_load[model]()
+    invalidate(*(scope_key(scope) for scope in RESPONSE_SCOPES))
+
 
 class Command(BaseCommand):
     help = 'Load data from csv files into database.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.STATIC_DATA,
+            help='Directory with csv files.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of rows written per query.',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_false',
+            dest='use_copy',
+            help='Do not use COPY on PostgreSQL.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Load independent files in N parallel processes.',
+        )
+        parser.add_argument(
+            '--partition-rows',
+            type=int,
+            default=DEFAULT_PARTITION_ROWS,
+            help='Split files larger than this between workers.',
+        )
+
     @staticmethod
     def is_related(model_object: Any, field_name: Any) -> bool:
         """Model field is related to foreign key."""
@@ -36,31 +373,43 @@ class Command(BaseCommand):
             if Command.is_related(instance, field_name):
                 keys[count] += "_id"
 
+    @staticmethod
+    def load_file(model: Any, path: str, batch_size: int, use_copy: bool,
+                  start: int = 0, stop: Optional[int] = None,
+                  run_post_load: bool = True) -> LoadResult:
+        """Load one csv file or its row range in a single transaction."""
+        with open(path, encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile, delimiter=',')
+            keys = reader.fieldnames
+            Command.add_suffix_for_related(model, keys)
+            with transaction.atomic():
+                loader = BulkFileLoader(model, keys, use_copy)
+                result = loader.load(islice(reader, start, stop), batch_size)
+                if run_post_load:
+                    after_load(model)
+        return result
+
     def handle(self, *args, **options):
         """Load data from csv files to database."""
+        if options['workers'] > 1:
+            self.handle_parallel(options)
+        else:
+            self.handle_sequential(options)
+
+    def handle_sequential(self, options):
         error_stream = self.stderr.write
-        output_stream = self.stdout.write
 
         for filename, model in model_by_filename:
             filename += '.csv'
-            path = os.path.join(settings.STATIC_DATA, filename)
+            path = os.path.join(options['path'], filename)
             try:
-                with open(path, encoding='utf-8') as csvfile:
-                    reader = csv.DictReader(csvfile, delimiter=',')
-                    keys = reader.fieldnames
-                    Command.add_suffix_for_related(model, keys)
-                    update, error = False, False
-                    for row in reader:
-                        object, created = model.objects.update_or_create(**row)
-                        if not object:
-                            error = True
-                        elif not created:
-                            update = True
-            except IntegrityError:
+                result = self.load_file(
+                    model, path, options['batch_size'], options['use_copy']
+                )
+            except (DatabaseError, ValueError) as error:
                 error_stream(self.style.ERROR(
-                    f'Not load {model.__name__}.'
-                    'Integrity error. Ensure order of loading files '
-                    'or succesful previously models load')
+                    f'Not load {model.__name__}. {error}. Ensure order of '
+                    'loading files or succesful previously models load')
                 )
                 continue
 
@@ -70,9 +419,130 @@ class Command(BaseCommand):
                 )
                 continue
 
-            if error:
-                error_stream(self.style.ERROR(f'Not load {model.__name__}'))
-            elif update:
-                output_stream(self.style.SUCCESS(f'Update {model.__name__}'))
-            else:
-                output_stream(self.style.SUCCESS(f'Created {model.__name__}'))
+            self.report(model, result)
+
+    def report(self, model: Any, result: LoadResult) -> None:
+        if result.skipped:
+            self.stderr.write(self.style.WARNING(
+                f'Skip {result.skipped} {model.__name__} rows '
+                'with unknown related objects.'
+            ))
+        action = 'Update' if result.updated else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {model.__name__}: {result.created} created, '
+            f'{result.updated} updated in {result.seconds:.2f}s '
+            f'({result.rows_per_second:.0f} rows/s)'
+        ))
+
+    def partitions(self, filename: str, path: str,
+                   partition_rows: int) -> List[Partition]:
+        rows = count_rows(path)
+        if rows <= partition_rows:
+            return [Partition(filename, path, 0, None)]
+        return [
+            Partition(filename, path, start, start + partition_rows)
+            for start in range(0, rows, partition_rows)
+        ]
+
+    def handle_parallel(self, options):
+        """Load files concurrently, each after the files it refers to."""
+        waiting = file_dependencies()
+        loaded: Set[str] = set()
+        remaining: Dict[str, int] = {}
+        results: Dict[str, List[LoadResult]] = {}
+        failed: Set[str] = set()
+        running = {}
+        # Дочерние процессы запускаются через spawn и открывают свои
+        # соединения, поэтому родитель не передаёт им открытый сокет.
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+        )
+
+        def submit_ready():
+            # Отсутствующий файл сразу считается загруженным и может
+            # открыть зависимые файлы, поэтому повторяем до неподвижной
+            # точки, даже если в пуле ничего не выполняется.
+            while True:
+                ready = [name for name, dependencies in waiting.items()
+                         if dependencies <= loaded | failed]
+                if not ready:
+                    return
+                for filename in ready:
+                    broken = waiting.pop(filename) & failed
+                    path = os.path.join(options['path'], f'{filename}.csv')
+                    reason = self.skip_reason(filename, path, broken)
+                    if reason:
+                        self.stderr.write(self.style.ERROR(reason))
+                        # Упавшие зависимости пропускают и зависимые файлы,
+                        # отсутствующий файл их не блокирует.
+                        (failed if broken else loaded).add(filename)
+                        continue
+                    parts = self.submit_file(pool, filename, path, options)
+                    running.update(parts)
+                    remaining[filename] = len(parts)
+                    results[filename] = []
+
+        with pool:
+            submit_ready()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+                    part, result, error = future.result()
+                    if error is not None:
+                        failed.add(part.filename)
+                        self.stderr.write(self.style.ERROR(
+                            f'Not load {part}. {error}'
+                        ))
+                    else:
+                        results[part.filename].append(result)
+                    remaining[part.filename] -= 1
+                    if not remaining[part.filename]:
+                        self.finish_file(
+                            part.filename, results[part.filename],
+                            part.filename in failed,
+                        )
+                        loaded.add(part.filename)
+                submit_ready()
+
+    @staticmethod
+    def skip_reason(filename: str, path: str,
+                    broken: Set[str]) -> Optional[str]:
+        """Why a file whose dependencies are done can not be loaded."""
+        if broken:
+            return (
+                f'Not load {filename}. Failed dependencies: '
+                f'{", ".join(sorted(broken))}.'
+            )
+        if not os.path.exists(path):
+            return f'Not load. File {path} not found.'
+        return None
+
+    def submit_file(self, pool: ProcessPoolExecutor, filename: str, path: str,
+                    options: Dict[str, Any]) -> Dict[Any, Partition]:
+        """Submit partitions of a file to the pool."""
+        return {
+            pool.submit(
+                load_partition, part,
+                options['batch_size'], options['use_copy'],
+            ): part
+            for part in self.partitions(
+                filename, path, options['partition_rows']
+            )
+        }
+
+    def finish_file(self, filename: str, results: List[LoadResult],
+                    failed: bool) -> None:
+        model = dict(model_by_filename)[filename]
+        with transaction.atomic():
+            after_load(model)
+        if failed:
+            self.stderr.write(self.style.ERROR(
+                f'Not load {model.__name__} completely, '
+                f'{len(results)} partitions loaded.'
+            ))
+        if results:
+            self.report(model, merge_results(results))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.models import Review, Title, TitleStats
+
+
+class Command(BaseCommand):
+    help = ('Recalculate and verify stored title ratings and score '
+            'histograms; also refresh pagination counters.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only verify stored ratings, do not change them.',
+        )
+
+    def handle(self, *args, **options):
+        """Recalculate ratings or report titles with stale ratings."""
+        stale_ids = list(
+            Title.objects.with_inconsistent_rating()
+            .values_list('pk', flat=True)
+        )
+        if options['check']:
+            if stale_ids:
+                raise CommandError(
+                    f'{len(stale_ids)} titles have stale rating: '
+                    f'{", ".join(map(str, stale_ids[:20]))}'
+                )
+            self.stdout.write(self.style.SUCCESS('All ratings are valid.'))
+            return
+
+        with transaction.atomic():
+            updated = Title.objects.all().recalculate_rating()
+            TitleStats.objects.create_missing()
+            TitleStats.objects.all().recalculate()
+            Title.objects.reset_counter()
+            Review.objects.all().recalculate_comments_count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recalculated {updated} titles, {len(stale_ids)} were stale.'
+        ))
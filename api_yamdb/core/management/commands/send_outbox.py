@@ -0,0 +1,130 @@
+import smtplib
+import statistics
+import time
+from typing import List, NamedTuple
+
+from core.models import Counter, OutboxMessage
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class BatchResult(NamedTuple):
+    sent: int
+    retried: int
+    failed: int
+    latencies: List[float]
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.retried + self.failed
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Messages claimed and sent per batch.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Seconds to sleep when there is nothing to send.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the messages that are due now and exit.',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Give up on a message after this many failures.',
+        )
+        parser.add_argument(
+            '--backoff', type=float, default=30.0,
+            help='Delay before the first retry, doubled on every failure.',
+        )
+        parser.add_argument(
+            '--max-backoff', type=float, default=3600.0,
+            help='Upper bound for the retry delay.',
+        )
+        parser.add_argument(
+            '--lease', type=float, default=600.0,
+            help='Seconds before messages claimed by a dead worker '
+                 'are sent again.',
+        )
+
+    def handle(self, *args, **options):
+        """Drain the outbox over a single reused SMTP connection."""
+        connection = get_connection()
+        try:
+            while True:
+                result = self.send_batch(connection, options)
+                if result.processed:
+                    self.report(result)
+                if result.processed < options['batch_size']:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+    def send_batch(self, connection, options) -> BatchResult:
+        """Claim a batch of due messages and try to send each one.
+
+        Sending happens outside a transaction: the claim is committed
+        first, and the results are saved in a second short transaction.
+        """
+        sent = retried = failed = 0
+        latencies = []
+        messages = OutboxMessage.objects.claim(
+            options['batch_size'], options['lease']
+        )
+        for message in messages:
+            started = time.monotonic()
+            try:
+                # Открытое заранее соединение send() не закрывает.
+                connection.open()
+                EmailMessage(
+                    message.subject, message.body, message.from_email,
+                    message.recipients, connection=connection,
+                ).send()
+            except (smtplib.SMTPException, OSError) as error:
+                # Соединение могло оборваться: следующее письмо
+                # откроет новое.
+                connection.close()
+                message.mark_failed(
+                    error, options['max_attempts'], options['backoff'],
+                    options['max_backoff'],
+                )
+                if message.status == OutboxMessage.FAILED:
+                    failed += 1
+                else:
+                    retried += 1
+            else:
+                message.mark_sent()
+                sent += 1
+            latencies.append(time.monotonic() - started)
+        result = BatchResult(sent, retried, failed, latencies)
+        with transaction.atomic():
+            OutboxMessage.objects.bulk_update(messages, (
+                'status', 'attempts', 'last_error', 'next_attempt_at',
+                'sent_at', 'body',
+            ))
+            for outcome, name in OutboxMessage.COUNTERS.items():
+                if getattr(result, outcome):
+                    Counter.objects.increment(name, getattr(result, outcome))
+        return result
+
+    def report(self, result: BatchResult) -> None:
+        latencies = sorted(result.latencies)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        self.stdout.write(
+            f'sent={result.sent} retried={result.retried} '
+            f'failed={result.failed} '
+            f'depth={OutboxMessage.objects.pending().count()} '
+            f'latency_avg_ms={statistics.mean(latencies) * 1000:.1f} '
+            f'latency_p95_ms={p95 * 1000:.1f}'
+        )
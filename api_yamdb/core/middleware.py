@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from core.instrumentation import RequestStats, current_stats, observe
+from django.conf import settings
+
+logger = logging.getLogger('yamdb.performance')
+
+
+def view_name(view_func, method: str) -> str:
+    """ViewSet.action for DRF views, the function name otherwise."""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
+
+
+class InstrumentationMiddleware:
+    """Record queries, DB time, serializer time and total time.
+
+    Adds a Server-Timing header when SERVER_TIMING is on, feeds the
+    /metrics histograms and logs requests over REQUEST_QUERY_BUDGET.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Как MiddlewareMixin: под ASGI остаёмся корутиной и не занимаем
+        # поток на всё время запроса.
+        if asyncio.iscoroutinefunction(self.get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats: RequestStats):
+        total = stats.total_time
+        observe(stats, request.method, total)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={stats.db_time * 1000:.1f};'
+                f'desc="{stats.queries} queries"',
+                'serialize;dur='
+                f'{stats.timings.get("serialize", 0.0) * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        if stats.queries > settings.REQUEST_QUERY_BUDGET:
+            logger.warning(
+                '%s %s (%s) ran %d queries, budget is %d; db %.1f ms, '
+                'total %.1f ms',
+                request.method, request.path, stats.view, stats.queries,
+                settings.REQUEST_QUERY_BUDGET, stats.db_time * 1000,
+                total * 1000,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = current_stats.get()
+        if stats is not None:
+            stats.view = view_name(view_func, request.method)
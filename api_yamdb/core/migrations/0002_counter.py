@@ -0,0 +1,20 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Имя')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Значение')),
+            ],
+        ),
+    ]
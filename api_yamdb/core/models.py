@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class OutboxMessageQuerySet(models.QuerySet):
+
+    def enqueue(self, subject, message, recipient_list, from_email=None):
+        """Store an email to be sent by the send_outbox worker."""
+        return self.create(
+            subject=subject, body=message, from_email=from_email,
+            recipients=list(recipient_list),
+        )
+
+    def pending(self):
+        """Messages not delivered yet, including the ones being sent."""
+        return self.filter(
+            status__in=(OutboxMessage.PENDING, OutboxMessage.SENDING)
+        )
+
+    def due(self):
+        """Pending messages and claims of workers that did not report."""
+        return self.pending().filter(next_attempt_at__lte=timezone.now())
+
+    def claim(self, limit, lease):
+        """Mark up to limit due messages as being sent and return them.
+
+        The claim is committed before sending, so no row lock is held
+        while the SMTP server answers. A worker that dies mid-send leaves
+        its messages due again once the lease of lease seconds expires.
+        """
+        with transaction.atomic(using=self.db):
+            messages = list(
+                self.due().select_for_update(skip_locked=True)[:limit]
+            )
+            until = timezone.now() + timedelta(seconds=lease)
+            for message in messages:
+                message.status = OutboxMessage.SENDING
+                message.next_attempt_at = until
+            self.bulk_update(messages, ('status', 'next_attempt_at'))
+        return messages
+
+
+class OutboxMessage(models.Model):
+    '''Письмо в очереди на отправку.'''
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    subject = models.CharField('Тема', max_length=256)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254, null=True)
+    recipients = models.JSONField('Получатели')
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    sent_at = models.DateTimeField('Отправлено', null=True)
+
+    # Счётчики Counter с итогами отправки, их отдаёт /metrics.
+    COUNTERS = {
+        'sent': 'outbox_sent',
+        'retried': 'outbox_retried',
+        'failed': 'outbox_failed',
+    }
+
+    objects = OutboxMessageQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('next_attempt_at', 'id')
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt_at', 'id'),
+                name='outbox_due_idx',
+            ),
+        ]
+
+    def mark_sent(self):
+        self.status = self.SENT
+        self.attempts += 1
+        self.sent_at = timezone.now()
+        self.last_error = ''
+        # В тексте письма код подтверждения: после отправки он не нужен.
+        self.body = ''
+
+    def mark_failed(self, error, max_attempts, backoff, max_backoff):
+        """Schedule a retry with exponential backoff or give up."""
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= max_attempts:
+            self.status = self.FAILED
+            self.body = ''
+            return
+        self.status = self.PENDING
+        delay = min(backoff * 2 ** (self.attempts - 1), max_backoff)
+        self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+    def __str__(self):
+        return f'{self.subject} -> {", ".join(self.recipients)}'
+
+
+class CounterQuerySet(models.QuerySet):
+
+    def value(self, name):
+        """Stored value or None when the counter was never initialized."""
+        return self.filter(name=name).values_list('value', flat=True).first()
+
+    def add(self, name, delta):
+        """Apply a delta; a missing counter stays missing until reset."""
+        return self.filter(name=name).update(value=models.F('value') + delta)
+
+    def increment(self, name, delta):
+        """Apply a delta, starting a missing counter from zero."""
+        if not self.add(name, delta):
+            self.bulk_create([Counter(name=name)], ignore_conflicts=True)
+            self.add(name, delta)
+
+    def totals(self, *names):
+        """Stored values by name; missing counters are zero."""
+        stored = dict(self.filter(name__in=names).values_list('name', 'value'))
+        return {name: stored.get(name, 0) for name in names}
+
+    def reset(self, name, value):
+        self.update_or_create(name=name, defaults={'value': value})
+
+
+class Counter(models.Model):
+    '''Поддерживаемый счётчик строк, например число произведений.'''
+    name = models.CharField('Имя', max_length=64, primary_key=True)
+    value = models.BigIntegerField('Значение', default=0)
+
+    objects = CounterQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
@@ -0,0 +1,36 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class PostgresOnlyMixin:
+    """Apply a migration operation to PostgreSQL databases only.
+
+    The state still changes everywhere, so the models stay in sync;
+    SQLite used in tests simply runs without the extra database objects.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class PostgresAddIndex(PostgresOnlyMixin, migrations.AddIndex):
+    pass
+
+
+class PostgresRunSQL(PostgresOnlyMixin, migrations.RunSQL):
+    pass
+
+
+class PostgresTrigramExtension(PostgresOnlyMixin, TrigramExtension):
+    pass
@@ -0,0 +1,58 @@
+"""Read-replica routing.
+
+Reads go to the alias chosen for the current request with read_from();
+writes, and reads outside a routed request, go to the default database.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+_read_database = ContextVar('read_database', default=DEFAULT_DB_ALIAS)
+
+
+@contextmanager
+def read_routing():
+    """Scope for read_from(): restores the previous alias on exit."""
+    token = _read_database.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def read_from(alias):
+    _read_database.set(alias)
+
+
+def reading_replica() -> bool:
+    return _read_database.get() != DEFAULT_DB_ALIAS
+
+
+def pin_key(user_pk) -> str:
+    return f'replica_pin:{user_pk}'
+
+
+def pin_to_primary(user) -> None:
+    """Serve the user's reads from default while the replica catches up."""
+    cache.set(pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user) -> bool:
+    return user.is_authenticated and cache.get(pin_key(user.pk), False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects read from the replica are saved to the primary too.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the default database.
+        return True
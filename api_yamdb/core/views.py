@@ -0,0 +1,32 @@
+from core.instrumentation import render_metrics, render_samples
+from core.models import Counter, OutboxMessage
+from django.db.models import Count
+from django.http import HttpResponse
+
+
+def outbox_metrics() -> str:
+    """Outbox results and queue depth, shared by all workers via the DB."""
+    totals = Counter.objects.totals(*OutboxMessage.COUNTERS.values())
+    depth = dict.fromkeys((OutboxMessage.PENDING, OutboxMessage.SENDING), 0)
+    depth.update(
+        OutboxMessage.objects.pending().order_by().values('status')
+        .annotate(total=Count('pk')).values_list('status', 'total')
+    )
+    return render_samples(
+        'yamdb_outbox_messages_total', 'Emails processed by send_outbox.',
+        'counter', 'result', {
+            outcome: totals[name]
+            for outcome, name in OutboxMessage.COUNTERS.items()
+        },
+    ) + render_samples(
+        'yamdb_outbox_depth', 'Emails waiting to be sent.', 'gauge',
+        'status', depth,
+    )
+
+
+def metrics(request):
+    """Request histograms of this process and outbox metrics (Prometheus)."""
+    return HttpResponse(
+        render_metrics() + outbox_metrics(),
+        content_type='text/plain; version=0.0.4',
+    )
@@ -0,0 +1,12 @@
+import django
+from django.apps import apps
+
+
+def init_worker() -> None:
+    """Set up Django in a spawned worker process.
+
+    Lives outside modules importing models: the pool unpickles the
+    initializer before the app registry is ready.
+    """
+    if not apps.ready:
+        django.setup()
@@ -0,0 +1,12 @@
+"""Gunicorn settings; SERVER_MODE=asgi serves the ASGI app with uvicorn."""
+import os
+
+bind = '0:8000'
+preload_app = True
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'api_yamdb.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'api_yamdb.wsgi:application'
@@ -0,0 +1,50 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:13
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    reviews = (
+        Review.objects.filter(title=OuterRef('pk')).order_by().values('title')
+    )
+    score_sum = Coalesce(
+        Subquery(reviews.annotate(total=Sum('score')).values('total')), 0
+    )
+    reviews_count = Coalesce(
+        Subquery(reviews.annotate(total=Count('pk')).values('total')), 0
+    )
+    Title.objects.using(schema_editor.connection.alias).update(
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=Cast(score_sum, FloatField()) / NullIf(reviews_count, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
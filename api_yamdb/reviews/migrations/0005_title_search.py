@@ -0,0 +1,41 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:24
+
+import core.operations
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def fill_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Title = apps.get_model('reviews', 'Title')
+    config = settings.TITLE_SEARCH_CONFIG
+    Title.objects.using(schema_editor.connection.alias).update(
+        search_vector=(
+            SearchVector('name', weight='A', config=config)
+            + SearchVector('description', weight='B', config=config)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        core.operations.PostgresAddIndex(
+            model_name='title',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='title_search_idx'),
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:27
+
+import core.operations
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='category_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='genre',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='genre_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name'], name='title_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'name'], name='title_year_name_idx'),
+        ),
+        # Фильтр genre идёт через промежуточную таблицу: уникальный индекс
+        # (title_id, genre_id) не помогает искать произведения по жанру.
+        migrations.RunSQL(
+            'CREATE INDEX title_genre_genre_title_idx '
+            'ON reviews_title_genre (genre_id, title_id)',
+            'DROP INDEX title_genre_genre_title_idx',
+        ),
+        # name__contains и поиск пользователей (icontains) дают LIKE '%x%',
+        # который на PostgreSQL поддерживают только триграммные индексы.
+        core.operations.PostgresTrigramExtension(),
+        core.operations.PostgresRunSQL(
+            'CREATE INDEX title_name_trgm_idx '
+            'ON reviews_title USING gin ((name::text) gin_trgm_ops)',
+            'DROP INDEX title_name_trgm_idx',
+        ),
+        core.operations.PostgresRunSQL(
+            'CREATE INDEX user_username_upper_trgm_idx '
+            'ON reviews_user USING gin (UPPER(username::text) gin_trgm_ops)',
+            'DROP INDEX user_username_upper_trgm_idx',
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:37
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleStats = apps.get_model('reviews', 'TitleStats')
+    Review = apps.get_model('reviews', 'Review')
+    db = schema_editor.connection.alias
+    buckets = defaultdict(dict)
+    scores = (
+        Review.objects.using(db).order_by().values('title_id', 'score')
+        .annotate(total=Count('pk'))
+    )
+    for row in scores:
+        buckets[row['title_id']][f'score_{row["score"]}'] = row['total']
+    TitleStats.objects.using(db).bulk_create(
+        (
+            TitleStats(title_id=title_id, **buckets[title_id])
+            for title_id in Title.objects.using(db).values_list(
+                'pk', flat=True
+            ).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.title')),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+                ('score_6', models.PositiveIntegerField(default=0)),
+                ('score_7', models.PositiveIntegerField(default=0)),
+                ('score_8', models.PositiveIntegerField(default=0)),
+                ('score_9', models.PositiveIntegerField(default=0)),
+                ('score_10', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Статистика оценок',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, FloatField, Value
+import core.operations
+import django.db.models.expressions
+import reviews.models
+
+
+def fill_ranking(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    weight = settings.RATING_PRIOR_WEIGHT
+    Title.objects.using(schema_editor.connection.alias).update(ranking=(
+        (Value(weight * settings.RATING_PRIOR_MEAN, FloatField())
+         + F('score_sum'))
+        / (Value(weight, FloatField()) + F('reviews_count'))
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='ranking',
+            field=models.FloatField(default=reviews.models.default_ranking, verbose_name='Байесовская оценка'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['ranking', 'id'], name='title_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'ranking', 'id'], name='title_category_ranking_idx'),
+        ),
+        # NULLS LAST в индексе SQLite не поддерживает.
+        core.operations.PostgresAddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('rating'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['reviews_count', 'id'], name='title_reviews_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_id_idx'),
+        ),
+        migrations.RunPython(fill_ranking, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:45
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_comment_updated_at(apps, schema_editor):
+    Comment = apps.get_model('reviews', 'Comment')
+    Comment.objects.using(schema_editor.connection.alias).update(
+        updated_at=F('pub_date')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(
+            fill_comment_updated_at, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at'], name='comment_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['updated_at'], name='review_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['updated_at'], name='title_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.18 on 2026-10-18 20:51
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    Counter = apps.get_model('core', 'Counter')
+    comments = Subquery(
+        Comment.objects.using(alias).filter(review=OuterRef('pk'))
+        .order_by().values('review')
+        .annotate(total=Count('pk')).values('total')
+    )
+    Review.objects.using(alias).update(comments_count=Coalesce(comments, 0))
+    Counter.objects.using(alias).update_or_create(
+        name='titles',
+        defaults={'value': Title.objects.using(alias).count()},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_counter'),
+        ('reviews', '0009_export_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.18 on 2026-10-18 21:28
+
+from django.db import migrations, models
+import core.operations
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_pagination_counters'),
+    ]
+
+    operations = [
+        # NULLS LAST в индексе SQLite не поддерживает.
+        core.operations.PostgresAddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('rating'), nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id')), name='title_rating_asc_idx'),
+        ),
+    ]
@@ -1,11 +1,19 @@
 import datetime as dt
 
+from core.models import Counter
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import (Count, F, FloatField, OuterRef, Q, Subquery, Sum,
+                              Value)
+from django.db.models.functions import Cast, Coalesce, NullIf, Upper
+from django.db.models.signals import m2m_changed
+from django.utils import timezone
 from reviews.validators import validate_username
 
 
@@ -60,6 +68,12 @@ class User(AbstractUser):
         default=USER
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
     @property
     def is_moderator(self):
         return self.is_staff or self.role == self.MODERATOR
@@ -96,6 +110,10 @@ class CommonGroupModel(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            # Поиск '=name' во вьюсетах превращается в UPPER(name) = UPPER(%s).
+            models.Index(Upper('name'), name='%(class)s_name_upper_idx'),
+        ]
 
 
 class Category(CommonGroupModel):
@@ -108,10 +126,108 @@ class Genre(CommonGroupModel):
     pass
 
 
+def default_ranking() -> float:
+    '''Байесовская оценка произведения без отзывов — априорное среднее.'''
+    return settings.RATING_PRIOR_MEAN
+
+
+# Хранимый рейтинг — float: при проверке сравниваем с допуском.
+RATING_TOLERANCE = 1e-9
+
+
+class TitleQuerySet(models.QuerySet):
+    '''Обслуживание хранимого рейтинга произведений.'''
+
+    @staticmethod
+    def _rating_expression(score_sum, reviews_count):
+        return Cast(score_sum, FloatField()) / NullIf(reviews_count, 0)
+
+    @staticmethod
+    def _ranking_expression(score_sum, reviews_count):
+        '''Байесовское среднее: к отзывам добавляется RATING_PRIOR_WEIGHT
+        воображаемых оценок RATING_PRIOR_MEAN, так что пара отзывов
+        с десятками не поднимает произведение на вершину.
+        '''
+        weight = settings.RATING_PRIOR_WEIGHT
+        prior = Value(weight * settings.RATING_PRIOR_MEAN, FloatField())
+        return (prior + score_sum) / (Value(weight, FloatField())
+                                      + reviews_count)
+
+    def apply_review_delta(self, score_delta: int, count_delta: int) -> int:
+        '''Инкрементально изменяет сумму оценок и число отзывов.'''
+        score_sum = F('score_sum') + score_delta
+        reviews_count = F('reviews_count') + count_delta
+        return self.update(
+            score_sum=score_sum,
+            reviews_count=reviews_count,
+            rating=self._rating_expression(score_sum, reviews_count),
+            ranking=self._ranking_expression(score_sum, reviews_count),
+            updated_at=timezone.now(),
+        )
+
+    def recalculate_rating(self) -> int:
+        '''Пересчитывает рейтинг по таблице отзывов.'''
+        reviews = (
+            Review.objects.filter(title=OuterRef('pk'))
+            .order_by().values('title')
+        )
+        score_sum = Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')), 0
+        )
+        reviews_count = Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')), 0
+        )
+        return self.update(
+            score_sum=score_sum,
+            reviews_count=reviews_count,
+            rating=self._rating_expression(score_sum, reviews_count),
+            ranking=self._ranking_expression(score_sum, reviews_count),
+            updated_at=timezone.now(),
+        )
+
+    def update_search_vector(self) -> int:
+        '''Пересчитывает поисковый вектор (только PostgreSQL).'''
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        config = settings.TITLE_SEARCH_CONFIG
+        return self.update(search_vector=(
+            SearchVector('name', weight='A', config=config)
+            + SearchVector('description', weight='B', config=config)
+        ))
+
+    def touch(self) -> int:
+        '''Отмечает изменение вложенных данных произведений.'''
+        return self.update(updated_at=timezone.now())
+
+    def reset_counter(self) -> None:
+        '''Пересчитывает общее число произведений после массовой загрузки.'''
+        Counter.objects.reset(Title.COUNTER, Title.objects.count())
+
+    def with_inconsistent_rating(self):
+        '''Произведения, у которых хранимый рейтинг разошёлся с отзывами.'''
+        return self.annotate(
+            actual_score_sum=Coalesce(Sum('reviews__score'), 0),
+            actual_reviews_count=Count('reviews'),
+        ).annotate(
+            actual_rating=self._rating_expression(
+                F('actual_score_sum'), F('actual_reviews_count')
+            ),
+        ).filter(
+            ~Q(score_sum=F('actual_score_sum'))
+            | ~Q(reviews_count=F('actual_reviews_count'))
+            | Q(rating__isnull=True, actual_reviews_count__gt=0)
+            | Q(rating__isnull=False, actual_reviews_count=0)
+            | Q(rating__lt=F('actual_rating') - RATING_TOLERANCE)
+            | Q(rating__gt=F('actual_rating') + RATING_TOLERANCE)
+        )
+
+
 class Title(models.Model):
     '''Модель произведения.'''
+    # Имя счётчика Counter с общим числом произведений.
+    COUNTER = 'titles'
 
-    def validate_year(self, year: int) -> None:
+    def validate_year(year: int) -> None:
         if dt.datetime.now().year < year:
             raise ValidationError("year not valid value")
 
@@ -119,6 +235,8 @@ class Title(models.Model):
     year = models.PositiveSmallIntegerField(
         validators=[validate_year]
     )
+    # Поле получило саму функцию; для вызова Title.validate_year(year).
+    validate_year = staticmethod(validate_year)
     description = models.TextField()
     category = models.ForeignKey(
         Category,
@@ -130,6 +248,166 @@ class Title(models.Model):
         Genre,
         verbose_name='Жанры'
     )
+    score_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    reviews_count = models.PositiveIntegerField('Число отзывов', default=0)
+    rating = models.FloatField('Рейтинг', null=True, blank=True)
+    ranking = models.FloatField('Байесовская оценка', default=default_ranking)
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TitleQuerySet.as_manager()
+
+    def set_genres(self, genres, *, is_new: bool = False) -> None:
+        '''Записывает жанры разницей с текущими.
+
+        В отличие от genre.set() удаляет и вставляет только изменившиеся
+        строки связи и не перечитывает таблицу перед вставкой; у нового
+        произведения текущих жанров нет, и они не читаются. Сигналы
+        m2m_changed отправляются так же, как при genre.set().
+        '''
+        through = Title.genre.through
+        links = through.objects.filter(title_id=self.pk)
+        current = set() if is_new else set(
+            links.values_list('genre_id', flat=True)
+        )
+        wanted = {genre.pk for genre in genres}
+        removed, added = current - wanted, wanted - current
+        with transaction.atomic():
+            if removed:
+                self.send_genre_signal('pre_remove', removed)
+                links.filter(genre_id__in=removed).delete()
+                self.send_genre_signal('post_remove', removed)
+            if added:
+                self.send_genre_signal('pre_add', added)
+                through.objects.bulk_create(
+                    (through(title_id=self.pk, genre_id=pk) for pk in added),
+                    ignore_conflicts=True,
+                )
+                self.send_genre_signal('post_add', added)
+
+    def send_genre_signal(self, action: str, pk_set: set) -> None:
+        m2m_changed.send(
+            sender=Title.genre.through, instance=self, action=action,
+            reverse=False, model=Genre, pk_set=pk_set, using=self._state.db,
+        )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(
+                fields=('category', 'name'), name='title_category_name_idx'
+            ),
+            models.Index(fields=('year', 'name'), name='title_year_name_idx'),
+            # Сортировки ?ordering=: хранимое поле и id для однозначности.
+            models.Index(fields=('ranking', 'id'), name='title_ranking_idx'),
+            models.Index(
+                fields=('category', 'ranking', 'id'),
+                name='title_category_ranking_idx'
+            ),
+            models.Index(
+                F('rating').desc(nulls_last=True), F('id').desc(),
+                name='title_rating_idx'
+            ),
+            # Обратный проход индекса выше даёт NULLS FIRST, а
+            # ?ordering=rating держит пустые рейтинги в конце.
+            models.Index(
+                F('rating').asc(nulls_last=True), F('id').asc(),
+                name='title_rating_asc_idx'
+            ),
+            models.Index(
+                fields=('reviews_count', 'id'), name='title_reviews_count_idx'
+            ),
+            models.Index(fields=('year', 'id'), name='title_year_id_idx'),
+            models.Index(fields=('updated_at',), name='title_updated_at_idx'),
+            GinIndex(fields=('search_vector',), name='title_search_idx'),
+        ]
+
+
+SCORES = range(1, 11)
+
+
+def score_field(score: int) -> str:
+    return f'score_{score}'
+
+
+class TitleStatsQuerySet(models.QuerySet):
+
+    def apply_score_delta(self, score: int, count_delta: int) -> int:
+        '''Инкрементально меняет корзину гистограммы для оценки.'''
+        field = score_field(score)
+        return self.update(**{field: F(field) + count_delta})
+
+    def create_missing(self) -> int:
+        '''Создаёт статистику для произведений, у которых её нет.'''
+        title_ids = Title.objects.filter(stats__isnull=True).values_list(
+            'pk', flat=True
+        )
+        created = self.bulk_create(
+            TitleStats(title_id=title_id) for title_id in title_ids
+        )
+        return len(created)
+
+    def recalculate(self) -> int:
+        '''Пересчитывает гистограммы по таблице отзывов.'''
+        reviews = (
+            Review.objects.filter(title=OuterRef('title_id'))
+            .order_by().values('title')
+        )
+        return self.update(**{
+            score_field(score): Coalesce(Subquery(
+                reviews.filter(score=score)
+                .annotate(total=Count('pk')).values('total')
+            ), 0)
+            for score in SCORES
+        })
+
+
+class TitleStats(models.Model):
+    '''Распределение оценок произведения.
+
+    Число отзывов и сумма оценок хранятся в самом произведении
+    (`reviews_count`, `score_sum`), здесь — только гистограмма.
+    '''
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    objects = TitleStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика оценок'
+
+    @property
+    def histogram(self):
+        '''Число оценок 1..10.'''
+        return [getattr(self, score_field(score)) for score in SCORES]
+
+
+class ReviewQuerySet(models.QuerySet):
+
+    def recalculate_comments_count(self) -> int:
+        '''Пересчитывает число комментариев по таблице комментариев.'''
+        comments = Subquery(
+            Comment.objects.filter(review=OuterRef('pk'))
+            .order_by().values('review')
+            .annotate(total=Count('pk')).values('total')
+        )
+        return self.update(
+            comments_count=Coalesce(comments, 0), updated_at=timezone.now()
+        )
 
 
 class Review(models.Model):
@@ -149,6 +427,7 @@ class Review(models.Model):
         on_delete=models.CASCADE,
         related_name='reviews'
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
     score = models.PositiveSmallIntegerField(
         default=0,
         validators=[
@@ -156,9 +435,53 @@ class Review(models.Model):
             MinValueValidator(1, 'Оценка не может быть меньше 1'),
         ],
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев', default=0
+    )
+
+    objects = ReviewQuerySet.as_manager()
+
+    def lock_stored_state(self, using=None):
+        '''Оценка и произведение строки в базе, строка блокируется.
+
+        Значения, прочитанные вместе с объектом, могли устареть:
+        сигналы считают рейтинг от текущей строки, а одновременные
+        изменения отзыва ждут друг друга. None — строки нет.
+        '''
+        self._stored_state = None
+        if self._state.adding or self.pk is None:
+            return None
+        self._stored_state = (
+            Review.objects.using(using or router.db_for_write(Review))
+            .select_for_update().filter(pk=self.pk)
+            .values('title_id', 'score').first()
+        )
+        return self._stored_state
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using')
+        with transaction.atomic(using=using):
+            self.lock_stored_state(using)
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            if self.lock_stored_state(using) is None:
+                # Отзыв уже удалён: счётчики не трогаем.
+                return 0, {}
+            return super().delete(using=using, keep_parents=keep_parents)
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=('updated_at',), name='review_updated_at_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('title', 'author',),
@@ -186,6 +509,20 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name='comments',
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+            # Инкрементальная выгрузка ?updated_since=.
+            models.Index(
+                fields=('updated_at',), name='comment_updated_at_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'Комментарий {self.author} к {self.review}'
@@ -0,0 +1,130 @@
+from core.models import Counter
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleStats, User)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, **kwargs):
+    '''Обновляет рейтинг и гистограмму оценок после сохранения отзыва.
+
+    Прежние оценку и произведение Review.save перечитывает из базы
+    под блокировкой строки (lock_stored_state).
+    '''
+    stored = getattr(instance, '_stored_state', None)
+    title = Title.objects.filter(pk=instance.title_id)
+    stats = TitleStats.objects.filter(title_id=instance.title_id)
+    if created:
+        title.apply_review_delta(instance.score, 1)
+        stats.apply_score_delta(instance.score, 1)
+    elif stored is None:
+        title.recalculate_rating()
+        stats.recalculate()
+    else:
+        if (stored['title_id'], stored['score']) != (
+            instance.title_id, instance.score
+        ):
+            TitleStats.objects.filter(
+                title_id=stored['title_id']
+            ).apply_score_delta(stored['score'], -1)
+            stats.apply_score_delta(instance.score, 1)
+        if stored['title_id'] != instance.title_id:
+            Title.objects.filter(pk=stored['title_id']).apply_review_delta(
+                -stored['score'], -1
+            )
+            title.apply_review_delta(instance.score, 1)
+        else:
+            title.apply_review_delta(instance.score - stored['score'], 0)
+    instance._stored_state = None
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    '''Обновляет хранимый рейтинг произведения после удаления отзыва.
+
+    Review.delete не удаляет уже удалённую строку, поэтому сигнал
+    приходит только для реально удалённых отзывов. При каскадном
+    удалении объект только что прочитан коллектором.
+    '''
+    stored = getattr(instance, '_stored_state', None) or {
+        'title_id': instance.title_id, 'score': instance.score,
+    }
+    Title.objects.filter(pk=stored['title_id']).apply_review_delta(
+        -stored['score'], -1
+    )
+    TitleStats.objects.filter(
+        title_id=stored['title_id']
+    ).apply_score_delta(stored['score'], -1)
+
+
+@receiver(post_save, sender=Title)
+def update_search_vector_on_title_save(sender, instance, **kwargs):
+    '''Пересчитывает поисковый вектор после сохранения произведения.'''
+    Title.objects.filter(pk=instance.pk).update_search_vector()
+
+
+@receiver(post_save, sender=Title)
+def create_stats_on_title_save(sender, instance, created, **kwargs):
+    if created:
+        TitleStats.objects.create(title=instance)
+        Counter.objects.add(Title.COUNTER, 1)
+
+
+@receiver(post_delete, sender=Title)
+def update_counter_on_title_delete(sender, instance, **kwargs):
+    Counter.objects.add(Title.COUNTER, -1)
+
+
+@receiver(post_save, sender=Comment)
+def update_review_on_comment_save(sender, instance, created, **kwargs):
+    changes = {'updated_at': timezone.now()}
+    if created:
+        changes['comments_count'] = F('comments_count') + 1
+    Review.objects.filter(pk=instance.review_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def update_review_on_comment_delete(sender, instance, **kwargs):
+    Review.objects.filter(pk=instance.review_id).update(
+        updated_at=timezone.now(), comments_count=F('comments_count') - 1
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genre_change(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        Title.objects.filter(pk=instance.pk).touch()
+    elif pk_set:
+        Title.objects.filter(pk__in=pk_set).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_titles_on_genre_change(sender, instance, **kwargs):
+    Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_titles_on_category_change(sender, instance, **kwargs):
+    Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_reviews_on_username_change(sender, instance, created, **kwargs):
+    '''Имя автора выводится в отзывах и комментариях.'''
+    loaded = getattr(instance, '_loaded_username', None)
+    if created or loaded is None or loaded == instance.username:
+        return
+    Title.objects.filter(reviews__author=instance).touch()
+    now = timezone.now()
+    Review.objects.filter(author=instance).update(updated_at=now)
+    Review.objects.filter(comments__author=instance).update(updated_at=now)
+    instance._loaded_username = instance.username
@@ -0,0 +1,94 @@
+"""Compare the bulk csv loader with the old per-row update_or_create path.
+
+    python -m benchmarks.bench_loadfromfile --reviews 1000000
+
+The old path needs a SELECT and an INSERT per row, so it only loads the
+first --legacy-rows reviews; both results are reported in rows/s.
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.datagen import Dataset, Scale, write_csv_dump
+from benchmarks.environment import setup_django, test_database
+from benchmarks.results import add_output_argument, dump
+
+
+def legacy_load(model, path, limit):
+    """The previous loadfromfile implementation, one query pair per row."""
+    from core.management.commands.loadfromfile import Command
+    with open(path, encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=',')
+        Command.add_suffix_for_related(model, reader.fieldnames)
+        started = time.monotonic()
+        rows = 0
+        for row in reader:
+            if rows == limit:
+                break
+            model.objects.update_or_create(**row)
+            rows += 1
+    return rows, time.monotonic() - started
+
+
+def clear_reviews():
+    from django.db import connection
+    from reviews.models import Review
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {Review._meta.db_table}')
+
+
+def run(options):
+    from core.management.commands.loadfromfile import (Command,
+                                                       model_by_filename)
+    from reviews.models import Review
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, test_database():
+        write_csv_dump(Dataset(Scale(
+            options.users, 10, 20, options.titles, options.reviews, 0
+        )), directory)
+        for filename, model in model_by_filename:
+            if model is Review:
+                break
+            path = os.path.join(directory, f'{filename}.csv')
+            if os.path.exists(path):
+                Command.load_file(model, path, options.batch_size, True)
+
+        review_path = os.path.join(directory, 'review.csv')
+        rows, seconds = legacy_load(Review, review_path, options.legacy_rows)
+        results['legacy'] = {
+            'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds
+        }
+        clear_reviews()
+        loaded = Command.load_file(
+            Review, review_path, options.batch_size, options.use_copy
+        )
+        results['bulk'] = {
+            'rows': loaded.rows, 'seconds': loaded.seconds,
+            'rows_per_second': loaded.rows_per_second,
+        }
+    results['speedup'] = (
+        results['bulk']['rows_per_second']
+        / results['legacy']['rows_per_second']
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=1_000_000)
+    parser.add_argument('--titles', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--legacy-rows', type=int, default=20_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--no-copy', action='store_false', dest='use_copy')
+    add_output_argument(parser)
+    options = parser.parse_args()
+    setup_django()
+    dump('loadfromfile', run(options), options.output)
+
+
+if __name__ == '__main__':
+    main()
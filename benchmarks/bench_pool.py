@@ -0,0 +1,55 @@
+"""Compare database connection handling of the web tier.
+
+    python -m benchmarks.bench_pool --modes wsgi asgi --duration 30
+
+Runs the bench_server load against gunicorn once per connection strategy:
+a new connection per request (DB_CONN_MAX_AGE=0), persistent connections
+with health checks (DB_CONN_MAX_AGE=60) and the in-process pool
+(DB_POOL=True). Point DB_* at the docker-compose db service or a local
+Postgres (migrate and load data first); the pool backend needs
+PostgreSQL. Reports requests per second and latency percentiles as JSON.
+"""
+import argparse
+import asyncio
+
+from benchmarks.bench_server import load, start_server
+from benchmarks.results import add_output_argument, dump
+
+STRATEGIES = {
+    'per_request': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_POOL': 'False'},
+    'pool': {'DB_POOL': 'True'},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=['wsgi'])
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES,
+                        default=list(STRATEGIES))
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    add_output_argument(parser)
+    options = parser.parse_args()
+
+    results = {}
+    for mode in options.modes:
+        for strategy in options.strategies:
+            server = start_server(
+                mode, options.port, options.workers, STRATEGIES[strategy]
+            )
+            try:
+                results[f'{mode}/{strategy}'] = asyncio.run(load(
+                    '127.0.0.1', options.port, options.connections,
+                    options.duration, 0.0,
+                ))
+            finally:
+                server.terminate()
+                server.wait()
+    dump('pool', results, options.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Measure /api/v1/titles/?search= latency on large catalogues.
+
+    python -m benchmarks.bench_search --sizes 100000 1000000
+
+Titles are loaded with loadfromfile, which also fills the search vector.
+Each query is timed through TitleFilter and compared with the old
+name__contains scan. Full-text search needs PostgreSQL; on SQLite both
+paths are sequential scans and the numbers only make sense as a baseline.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.datagen import Dataset, Scale, write_csv_dump
+from benchmarks.environment import setup_django, test_database
+from benchmarks.results import add_output_argument, dump
+
+QUERIES = ('звезда', 'тайна острова', 'ночной город', 'король -зима')
+
+
+def time_query(queryset, repeat, limit):
+    timings = []
+    for _ in range(repeat):
+        started = time.monotonic()
+        list(queryset[:limit])
+        timings.append((time.monotonic() - started) * 1000)
+    return {
+        'median_ms': statistics.median(timings),
+        'max_ms': max(timings),
+    }
+
+
+def run_size(size, options):
+    from api.filters import TitleFilter
+    from core.management.commands.loadfromfile import Command
+    from django.db import connection
+    from reviews.models import Category, Title
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        write_csv_dump(Dataset(Scale(1, 10, 1, size, 0, 0)), directory)
+        Command.load_file(Category, os.path.join(directory, 'category.csv'),
+                          options.batch_size, True)
+        Command.load_file(Title, os.path.join(directory, 'titles.csv'),
+                          options.batch_size, True)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Title._meta.db_table}')
+
+    queryset = Title.objects.all()
+    for query in QUERIES:
+        search = TitleFilter({'search': query}, queryset=queryset).qs
+        contains = queryset.filter(name__contains=query.split()[0])
+        results[query] = {
+            'matches': search.count(),
+            'search': time_query(search, options.repeat, options.limit),
+            'contains': time_query(contains, options.repeat, options.limit),
+        }
+    Title.objects.all().delete()
+    Category.objects.all().delete()
+    return results
+
+
+def run(options):
+    from django.db import connection
+
+    results = {'vendor': None, 'sizes': {}}
+    with test_database():
+        results['vendor'] = connection.vendor
+        for size in options.sizes:
+            results['sizes'][size] = run_size(size, options)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    add_output_argument(parser)
+    options = parser.parse_args()
+    setup_django()
+    dump('search', run(options), options.output)
+
+
+if __name__ == '__main__':
+    main()
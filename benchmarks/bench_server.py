@@ -0,0 +1,140 @@
+"""Compare WSGI and ASGI serving modes under many concurrent connections.
+
+    python -m benchmarks.bench_server --connections 1000 --duration 30
+
+For every mode gunicorn is started from api_yamdb/gunicorn.conf.py with
+SERVER_MODE set accordingly, against the database from the DB_* variables
+(migrate and load data first). The load client keeps --connections
+HTTP/1.1 connections busy for --duration seconds, optionally reading each
+response slowly to imitate slow clients, and reports throughput and
+latency percentiles as JSON.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.environment import PROJECT_DIR
+from benchmarks.results import add_output_argument, dump
+
+PATHS = ('/api/v1/titles/', '/api/v1/titles/1/',
+         '/api/v1/titles/1/reviews/')
+
+
+async def fetch(reader, writer, host, path, read_delay):
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+        'Connection: keep-alive\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(
+        line.lower().split(': ', 1) for line in lines[1:] if ': ' in line
+    )
+    length = int(headers.get('content-length', 0))
+    if read_delay:
+        while length:
+            chunk = await reader.read(min(length, 1024))
+            length -= len(chunk)
+            await asyncio.sleep(read_delay)
+    else:
+        await reader.readexactly(length)
+    return status, headers.get('connection') == 'close'
+
+
+async def client(host, port, deadline, read_delay, latencies, errors):
+    connection = None
+    number = 0
+    while time.monotonic() < deadline:
+        path = PATHS[number % len(PATHS)]
+        number += 1
+        started = time.monotonic()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(host, port)
+            status, closed = await fetch(*connection, host, path, read_delay)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append(1)
+            connection = None
+            await asyncio.sleep(0.01)
+            continue
+        if status != 200:
+            errors.append(status)
+        latencies.append(time.monotonic() - started)
+        if closed:
+            connection[1].close()
+            connection = None
+
+
+async def load(host, port, connections, duration, read_delay):
+    latencies, errors = [], []
+    started = time.monotonic()
+    await asyncio.gather(*(
+        client(host, port, started + duration, read_delay, latencies, errors)
+        for _ in range(connections)
+    ))
+    elapsed = time.monotonic() - started
+    quantiles = statistics.quantiles(latencies, n=100) if latencies else []
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_second': len(latencies) / elapsed,
+        'p50_ms': quantiles[49] * 1000 if quantiles else None,
+        'p95_ms': quantiles[94] * 1000 if quantiles else None,
+        'p99_ms': quantiles[98] * 1000 if quantiles else None,
+    }
+
+
+def start_server(mode, port, workers, extra_env=None):
+    # All load comes from one address, so the catalogue limit is off.
+    env = dict(os.environ, SERVER_MODE=mode, GUNICORN_WORKERS=str(workers),
+               THROTTLE_CATALOGUE_RATE='', **(extra_env or {}))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+         '--bind', f'127.0.0.1:{port}', '--backlog', '4096'],
+        cwd=PROJECT_DIR, env=env,
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}{PATHS[0]}')
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'])
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--read-delay', type=float, default=0.0,
+                        help='Seconds to wait between 1 KB reads.')
+    add_output_argument(parser)
+    options = parser.parse_args()
+
+    results = {}
+    for mode in options.modes:
+        server = start_server(mode, options.port, options.workers)
+        try:
+            results[mode] = asyncio.run(load(
+                '127.0.0.1', options.port, options.connections,
+                options.duration, options.read_delay,
+            ))
+        finally:
+            server.terminate()
+            server.wait()
+    dump('server', results, options.output)
+
+
+if __name__ == '__main__':
+    main()
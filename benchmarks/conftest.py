@@ -0,0 +1,45 @@
+"""Fixtures of the pytest-benchmark suite.
+
+    pytest benchmarks --bench-scale medium --benchmark-json=result.json
+
+The suite runs against a test database created from the DB_* settings;
+the dataset is generated once per session by benchmarks.datagen.
+"""
+import pytest
+
+from benchmarks.datagen import SCALES, Dataset, fill_database, write_csv_dump
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--bench-scale', choices=SCALES, default='small',
+        help='Dataset size for the benchmark suite.',
+    )
+
+
+@pytest.fixture(scope='session')
+def dataset(request):
+    return Dataset(SCALES[request.config.getoption('--bench-scale')])
+
+
+@pytest.fixture(scope='session')
+def catalogue(dataset, django_db_setup, django_db_blocker):
+    """Generated catalogue, committed once for the whole session."""
+    with django_db_blocker.unblock():
+        fill_database(dataset)
+    return dataset
+
+
+@pytest.fixture(scope='session')
+def csv_dump(dataset, tmp_path_factory):
+    directory = tmp_path_factory.mktemp('data')
+    write_csv_dump(dataset, str(directory))
+    return str(directory)
+
+
+@pytest.fixture(autouse=True)
+def no_throttling(settings):
+    """All benchmark requests come from one user; measure without limits."""
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {},
+    }
@@ -0,0 +1,227 @@
+"""Deterministic synthetic catalogue for benchmarks and load tests.
+
+    python -m benchmarks.datagen --scale medium            # into DB_* database
+    python -m benchmarks.datagen --scale large --csv DIR   # loadfromfile dump
+
+The same scale and seed always give the same rows. Reviews per title
+follow a Zipf distribution, so a few titles are very popular and most
+have a handful of reviews, like a real catalogue.
+"""
+import argparse
+import csv
+import os
+import random
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+from django.utils.functional import cached_property
+
+from benchmarks.environment import setup_django
+
+
+class Scale(NamedTuple):
+    users: int
+    categories: int
+    genres: int
+    titles: int
+    reviews: int
+    comments: int
+
+
+SCALES = {
+    'tiny': Scale(50, 3, 5, 40, 300, 600),
+    'small': Scale(500, 5, 10, 1_000, 10_000, 20_000),
+    'medium': Scale(5_000, 10, 20, 10_000, 100_000, 200_000),
+    'large': Scale(50_000, 20, 40, 100_000, 1_000_000, 2_000_000),
+}
+
+HEADERS = {
+    'category': ('id', 'name', 'slug'),
+    'genre': ('id', 'name', 'slug'),
+    'titles': ('id', 'name', 'year', 'category', 'description'),
+    'genre_title': ('id', 'title_id', 'genre_id'),
+    'users': ('id', 'username', 'email', 'role', 'bio', 'first_name',
+              'last_name'),
+    'review': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+
+WORDS = (
+    'война', 'мир', 'звезда', 'тень', 'город', 'море', 'ночь', 'песня',
+    'дорога', 'король', 'сердце', 'огонь', 'зима', 'остров', 'тайна',
+    'река', 'небо', 'ветер', 'память', 'сад', 'дом', 'свет', 'время', 'лес',
+)
+PUB_DATE = '2019-09-24T21:08:21.567Z'
+
+
+def zipf_counts(total: int, size: int, skew: float, cap: int) -> List[int]:
+    """Split total into size counts proportional to 1 / rank ** skew.
+
+    No count exceeds cap; what does not fit goes to the next ranks.
+    """
+    weights = [1 / rank ** skew for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [min(int(weight * scale), cap) for weight in weights]
+    left = min(total, cap * size) - sum(counts)
+    while left > 0:
+        for index in range(size):
+            if left == 0:
+                break
+            if counts[index] < cap:
+                counts[index] += 1
+                left -= 1
+    return counts
+
+
+class Dataset:
+    """Rows of every csv table, generated lazily and reproducibly."""
+
+    def __init__(self, scale: Scale, seed: int = 42, skew: float = 1.1):
+        self.scale = scale
+        self.seed = seed
+        self.skew = skew
+
+    def random(self, table: str) -> random.Random:
+        # Отдельный генератор на таблицу: строки любой таблицы можно
+        # получить повторно, не генерируя остальные.
+        return random.Random(f'{self.seed}:{table}')
+
+    @cached_property
+    def reviews_per_title(self) -> List[int]:
+        counts = zipf_counts(
+            self.scale.reviews, self.scale.titles, self.skew, self.scale.users
+        )
+        self.random('popularity').shuffle(counts)
+        return counts
+
+    @property
+    def review_total(self) -> int:
+        return sum(self.reviews_per_title)
+
+    @cached_property
+    def first_review_ids(self) -> List[int]:
+        firsts, next_id = [], 1
+        for count in self.reviews_per_title:
+            firsts.append(next_id)
+            next_id += count
+        return firsts
+
+    def review_ids(self, title_id: int) -> range:
+        """Ids of the reviews generated for title_id."""
+        first = self.first_review_ids[title_id - 1]
+        return range(first, first + self.reviews_per_title[title_id - 1])
+
+    def rows(self, table: str) -> Iterator[Tuple]:
+        return getattr(self, f'{table}_rows')(self.random(table))
+
+    def category_rows(self, rnd):
+        for i in range(1, self.scale.categories + 1):
+            yield i, f'Категория {i}', f'category_{i}'
+
+    def genre_rows(self, rnd):
+        for i in range(1, self.scale.genres + 1):
+            yield i, f'Жанр {i}', f'genre_{i}'
+
+    def titles_rows(self, rnd):
+        for i in range(1, self.scale.titles + 1):
+            yield (
+                i, ' '.join(rnd.sample(WORDS, 3)).capitalize(),
+                rnd.randint(1950, 2022), rnd.randint(1, self.scale.categories),
+                ' '.join(rnd.choices(WORDS, k=20)),
+            )
+
+    def genre_title_rows(self, rnd):
+        pk = 0
+        for title_id in range(1, self.scale.titles + 1):
+            size = min(rnd.randint(1, 3), self.scale.genres)
+            for genre_id in rnd.sample(range(1, self.scale.genres + 1), size):
+                pk += 1
+                yield pk, title_id, genre_id
+
+    def users_rows(self, rnd):
+        for i in range(1, self.scale.users + 1):
+            role = 'admin' if i == 1 else 'moderator' if i <= 3 else 'user'
+            yield i, f'user_{i}', f'user_{i}@yamdb.fake', role, '', '', ''
+
+    def review_rows(self, rnd):
+        pk = 0
+        users = range(1, self.scale.users + 1)
+        for title_id, count in enumerate(self.reviews_per_title, start=1):
+            for author in rnd.sample(users, count):
+                pk += 1
+                score = min(10, max(1, round(rnd.gauss(7, 2))))
+                yield pk, title_id, 'Отзыв', author, score, PUB_DATE
+
+    def comments_rows(self, rnd):
+        reviews = self.review_total
+        for i in range(1, self.scale.comments + 1 if reviews else 1):
+            yield (i, rnd.randint(1, reviews), 'Комментарий',
+                   rnd.randint(1, self.scale.users), PUB_DATE)
+
+
+def write_csv_dump(dataset: Dataset, directory: str) -> Dict[str, int]:
+    """Write the dataset in the static/data layout read by loadfromfile."""
+    written = {}
+    for table, header in HEADERS.items():
+        with open(os.path.join(directory, f'{table}.csv'), 'w',
+                  encoding='utf-8', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            written[table] = 0
+            for row in dataset.rows(table):
+                writer.writerow(row)
+                written[table] += 1
+    return written
+
+
+def fill_database(dataset: Dataset, batch_size: int = 5000) -> Dict[str, int]:
+    """Insert the dataset with bulk_create and refresh derived fields."""
+    from core.management.commands.loadfromfile import (Command, batched,
+                                                       model_by_filename)
+    from django.core.management.color import no_style
+    from django.db import connection, transaction
+    from reviews.models import Review, Title, TitleStats
+
+    created = {}
+    with transaction.atomic():
+        for table, model in model_by_filename:
+            names = list(HEADERS[table])
+            Command.add_suffix_for_related(model, names)
+            created[table] = 0
+            for batch in batched(dataset.rows(table), batch_size):
+                model.objects.bulk_create(
+                    model(**dict(zip(names, row))) for row in batch
+                )
+                created[table] += len(batch)
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model]
+                ):
+                    cursor.execute(sql)
+        Title.objects.recalculate_rating()
+        Title.objects.update_search_vector()
+        Title.objects.reset_counter()
+        Review.objects.recalculate_comments_count()
+        TitleStats.objects.create_missing()
+        TitleStats.objects.recalculate()
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skew', type=float, default=1.1)
+    parser.add_argument('--csv', metavar='DIR',
+                        help='Write csv files instead of filling the DB.')
+    options = parser.parse_args()
+    dataset = Dataset(SCALES[options.scale], options.seed, options.skew)
+    if options.csv:
+        os.makedirs(options.csv, exist_ok=True)
+        print(write_csv_dump(dataset, options.csv))
+        return
+    setup_django()
+    print(fill_database(dataset))
+
+
+if __name__ == '__main__':
+    main()
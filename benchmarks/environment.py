@@ -0,0 +1,31 @@
+"""Django bootstrap shared by the benchmark scripts.
+
+Benchmarks run against a throwaway test database created next to the one
+configured through the usual DB_* environment variables, so they never
+touch real data.
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT_DIR, 'api_yamdb')
+
+
+def setup_django() -> None:
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create the test database for the duration of a benchmark."""
+    from django.test.utils import setup_databases, teardown_databases
+    config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(config, verbosity=0)
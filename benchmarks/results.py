@@ -0,0 +1,51 @@
+"""JSON output shared by the benchmark scripts.
+
+Every result carries the commit it was measured on, so files from
+different runs can be compared directly.
+"""
+import datetime
+import json
+import platform
+import subprocess
+
+from benchmarks.environment import ROOT_DIR
+
+
+def git(*args) -> str:
+    try:
+        return subprocess.run(
+            ('git', *args), cwd=ROOT_DIR, capture_output=True, text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def metadata() -> dict:
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'created_at': datetime.datetime.now(
+            datetime.timezone.utc
+        ).isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+    }
+
+
+def dump(name: str, results: dict, output: str = None) -> None:
+    """Print results as JSON or write them to output."""
+    document = json.dumps(
+        {'benchmark': name, **metadata(), 'results': results},
+        indent=2, ensure_ascii=False,
+    )
+    if output is None:
+        print(document)
+        return
+    with open(output, 'w', encoding='utf-8') as file:
+        file.write(document + '\n')
+
+
+def add_output_argument(parser) -> None:
+    parser.add_argument('--output', metavar='FILE',
+                        help='Write JSON results to FILE instead of stdout.')
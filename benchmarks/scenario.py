@@ -0,0 +1,177 @@
+"""Locust-style HTTP scenario against a running server.
+
+    python -m benchmarks.datagen --scale small
+    python -m benchmarks.scenario --host http://127.0.0.1:8000 \\
+        --scale small --users 200 --duration 60
+
+Virtual users pick weighted tasks, wait a random think time between
+requests and keep their own keep-alive connection. Popular titles are
+read more often, following the review distribution of the generated
+dataset, so --scale and --seed must match the data in the database.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Callable, NamedTuple
+from urllib.parse import urlsplit
+
+from benchmarks.bench_server import fetch
+from benchmarks.datagen import SCALES, WORDS, Dataset
+from benchmarks.results import add_output_argument, dump
+
+
+class Task(NamedTuple):
+    name: str
+    weight: int
+    path: Callable[[random.Random, 'Scenario'], str]
+
+
+TASKS = (
+    Task('titles_list', 5, lambda rnd, scenario: (
+        f'/api/v1/titles/?limit=10&offset={rnd.randrange(0, 100, 10)}'
+    )),
+    Task('titles_filter', 2, lambda rnd, scenario: (
+        f'/api/v1/titles/?genre=genre_'
+        f'{rnd.randint(1, scenario.dataset.scale.genres)}'
+    )),
+    Task('titles_search', 1, lambda rnd, scenario: (
+        f'/api/v1/titles/?search={rnd.choice(WORDS)}'
+    )),
+    Task('title_detail', 4, lambda rnd, scenario: (
+        f'/api/v1/titles/{scenario.popular_title(rnd)}/'
+    )),
+    Task('reviews_list', 4, lambda rnd, scenario: (
+        f'/api/v1/titles/{scenario.popular_title(rnd)}/reviews/'
+    )),
+    Task('comments_list', 2, lambda rnd, scenario: (
+        scenario.comments_path(rnd)
+    )),
+)
+
+
+class Scenario:
+
+    def __init__(self, dataset: Dataset, tasks=TASKS):
+        self.dataset = dataset
+        self.tasks = tasks
+        self.weights = [task.weight for task in tasks]
+        self.title_ids = range(1, dataset.scale.titles + 1)
+        # +1: названия без отзывов тоже иногда открывают.
+        self.title_weights = [
+            count + 1 for count in dataset.reviews_per_title
+        ]
+
+    def popular_title(self, rnd) -> int:
+        return rnd.choices(self.title_ids, self.title_weights)[0]
+
+    def comments_path(self, rnd) -> str:
+        title = self.popular_title(rnd)
+        reviews = self.dataset.review_ids(title)
+        review = rnd.choice(reviews) if reviews else 1
+        return f'/api/v1/titles/{title}/reviews/{review}/comments/'
+
+
+async def virtual_user(number, scenario, options, deadline, stats):
+    rnd = random.Random(f'{options.seed}:user:{number}')
+    host, port = options.address
+    connection = None
+    while time.monotonic() < deadline:
+        task = rnd.choices(scenario.tasks, scenario.weights)[0]
+        path = task.path(rnd, scenario)
+        started = time.monotonic()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(host, port)
+            status, closed = await fetch(*connection, host, path, 0)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            stats[task.name]['errors'] += 1
+            connection = None
+        else:
+            stats[task.name]['latencies'].append(time.monotonic() - started)
+            if status >= 400:
+                stats[task.name]['errors'] += 1
+            if closed:
+                connection[1].close()
+                connection = None
+        await asyncio.sleep(rnd.uniform(*options.think_time))
+    if connection is not None:
+        connection[1].close()
+
+
+async def run(scenario, options):
+    stats = defaultdict(lambda: {'latencies': [], 'errors': 0})
+    started = time.monotonic()
+    deadline = started + options.duration
+    users = []
+    for number in range(options.users):
+        users.append(asyncio.create_task(
+            virtual_user(number, scenario, options, deadline, stats)
+        ))
+        await asyncio.sleep(1 / options.spawn_rate)
+    await asyncio.gather(*users)
+    elapsed = time.monotonic() - started
+    return summarize(stats, elapsed)
+
+
+def percentiles(latencies):
+    if len(latencies) < 2:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        'p50_ms': quantiles[49] * 1000,
+        'p95_ms': quantiles[94] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+    }
+
+
+def summarize(stats, elapsed):
+    results = {}
+    everything = []
+    for name, task_stats in sorted(stats.items()):
+        latencies = task_stats['latencies']
+        everything.extend(latencies)
+        results[name] = {
+            'requests': len(latencies),
+            'errors': task_stats['errors'],
+            'requests_per_second': len(latencies) / elapsed,
+            **percentiles(latencies),
+        }
+    results['total'] = {
+        'requests': len(everything),
+        'errors': sum(task['errors'] for task in stats.values()),
+        'requests_per_second': len(everything) / elapsed,
+        **percentiles(everything),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='http://127.0.0.1:8000')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--spawn-rate', type=float, default=50,
+                        help='Virtual users started per second.')
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--think-time', type=float, nargs=2,
+                        default=(0.5, 2.0), metavar=('MIN', 'MAX'))
+    add_output_argument(parser)
+    options = parser.parse_args()
+    url = urlsplit(options.host)
+    options.address = (url.hostname, url.port or 80)
+
+    scenario = Scenario(Dataset(SCALES[options.scale], options.seed))
+    results = asyncio.run(run(scenario, options))
+    results['options'] = {
+        'scale': options.scale, 'users': options.users,
+        'duration': options.duration, 'think_time': options.think_time,
+    }
+    dump('scenario', results, options.output)
+
+
+if __name__ == '__main__':
+    main()
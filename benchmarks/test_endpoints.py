@@ -0,0 +1,49 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from reviews.models import User
+
+pytest.importorskip('pytest_benchmark')
+
+ROUNDS = 30
+ENDPOINTS = {
+    'titles_list': '/api/v1/titles/',
+    'titles_filtered': '/api/v1/titles/?genre=genre_1&category=category_1',
+    'titles_search': '/api/v1/titles/?search=звезда',
+    'title_detail': '/api/v1/titles/{title}/',
+    'reviews_list': '/api/v1/titles/{title}/reviews/',
+    'reviews_cursor': '/api/v1/titles/{title}/reviews/?cursor=',
+    'comments_list': '/api/v1/titles/{title}/reviews/{review}/comments/',
+    'categories_list': '/api/v1/categories/',
+    'users_list': '/api/v1/users/',
+}
+
+
+def popular_ids(dataset):
+    """The most reviewed title and its first review."""
+    counts = dataset.reviews_per_title
+    index = max(range(len(counts)), key=counts.__getitem__)
+    return index + 1, dataset.review_ids(index + 1)[0]
+
+
+@pytest.fixture
+def admin_client(catalogue):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(username='user_1'))
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('warm', (False, True), ids=('cold', 'warm'))
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_endpoint(benchmark, catalogue, admin_client, endpoint, warm):
+    title, review = popular_ids(catalogue)
+    url = ENDPOINTS[endpoint].format(title=title, review=review)
+    benchmark.group = endpoint
+    if warm:
+        admin_client.get(url)
+    response = benchmark.pedantic(
+        admin_client.get, args=(url,), rounds=ROUNDS,
+        setup=None if warm else cache.clear,
+    )
+    assert response.status_code == 200
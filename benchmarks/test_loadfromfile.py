@@ -0,0 +1,31 @@
+import io
+
+import pytest
+from core.management.commands.loadfromfile import model_by_filename
+from django.core.management import call_command
+from django.db import connection
+
+pytest.importorskip('pytest_benchmark')
+
+
+def clear_tables():
+    """Empty the loaded tables; the test transaction restores them."""
+    with connection.cursor() as cursor:
+        for _, model in reversed(model_by_filename):
+            table = connection.ops.quote_name(model._meta.db_table)
+            cursor.execute(f'DELETE FROM {table}')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('use_copy', (True, False), ids=('copy', 'no_copy'))
+def test_loadfromfile(benchmark, csv_dump, use_copy):
+    if use_copy and connection.vendor != 'postgresql':
+        pytest.skip('COPY работает только на PostgreSQL')
+    args = ['loadfromfile', '--path', csv_dump]
+    if not use_copy:
+        args.append('--no-copy')
+    benchmark.group = 'loadfromfile'
+    benchmark.pedantic(
+        call_command, args=args, kwargs={'stdout': io.StringIO()},
+        setup=clear_tables, rounds=3,
+    )
@@ -0,0 +1,58 @@
+"""Serialization of 1,000 rows: DRF ListSerializer vs the compiled path.
+
+    pytest benchmarks/test_serializers.py --benchmark-group-by=group
+
+Rows are loaded once per test, so only the serializer is measured.
+"""
+import pytest
+from api.serializers import (CommentsSerializer, ListRetrieveTitleSerializer,
+                             ReviewSerializer)
+from rest_framework import serializers
+from reviews.models import Comment, Review, Title
+
+pytest.importorskip('pytest_benchmark')
+
+ROWS = 1000
+ROUNDS = 20
+SERIALIZERS = {
+    'titles': (
+        ListRetrieveTitleSerializer,
+        lambda: Title.objects.select_related('category', 'stats')
+        .prefetch_related('genre'),
+        {'include_stats': True},
+    ),
+    'reviews': (
+        ReviewSerializer,
+        lambda: Review.objects.select_related('author'),
+        {},
+    ),
+    'comments': (
+        CommentsSerializer,
+        lambda: Comment.objects.select_related('author'),
+        {},
+    ),
+}
+
+
+def regular(serializer_class, rows, context):
+    return serializers.ListSerializer(
+        rows, child=serializer_class(context=context), context=context
+    ).data
+
+
+def compiled(serializer_class, rows, context):
+    return serializer_class(rows, many=True, context=context).data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('path', (regular, compiled),
+                         ids=('regular', 'compiled'))
+@pytest.mark.parametrize('name', SERIALIZERS)
+def test_serializer(benchmark, catalogue, name, path):
+    serializer_class, queryset, context = SERIALIZERS[name]
+    rows = list(queryset()[:ROWS])
+    benchmark.group = f'serialize {name} x{len(rows)}'
+    data = benchmark.pedantic(
+        path, args=(serializer_class, rows, context), rounds=ROUNDS
+    )
+    assert len(data) == len(rows)
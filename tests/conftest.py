@@ -1,9 +1,35 @@
+import os
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
+if not os.getenv('DB_HOST'):
+    # Без внешнего Postgres тесты работают на SQLite в памяти;
+    # отдельная база replica изображает реплику для чтения.
+    settings.DATABASES = {
+        alias: {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+        for alias in ('default', 'replica')
+    }
+    connections.__dict__.pop('settings', None)
+    connections.__init__()
+
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
@@ -0,0 +1,39 @@
+import pytest
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+@pytest.fixture
+def catalogue(django_user_model):
+    '''Каталог: произведения с жанрами, отзывы и комментарии к ним.'''
+    def make(titles=20, reviews=20, comments=20):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre_{i}')
+            for i in range(3)
+        ]
+        authors = [
+            django_user_model.objects.create(
+                username=f'author_{i}', email=f'author_{i}@yamdb.fake'
+            )
+            for i in range(max(reviews, comments))
+        ]
+        created = []
+        for i in range(titles):
+            title = Title.objects.create(
+                name=f'Произведение {i}', year=2000 + i % 20,
+                description='описание', category=category
+            )
+            title.genre.set(genres[:i % 3 + 1])
+            created.append(title)
+        first = created[0]
+        for author in authors[:reviews]:
+            Review.objects.create(
+                title=first, author=author, text='отзыв', score=7
+            )
+        review = first.reviews.first()
+        for author in authors[:comments]:
+            Comment.objects.create(
+                review=review, author=author, text='комментарий'
+            )
+        return first, review
+    return make
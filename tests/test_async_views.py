@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+from api.async_views import as_async_view, asyncify_routes
+from api.urls import router_v1
+from api.views import TitleViewSet
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+
+
+class TestAsyncRoutes:
+
+    def test_hot_routes_become_coroutines(self):
+        patterns = asyncify_routes(list(router_v1.get_urls()))
+        async_names = {
+            pattern.name for pattern in patterns
+            if asyncio.iscoroutinefunction(pattern.callback)
+        }
+        assert async_names == {
+            'title-list', 'title-detail', 'reviews-list', 'comments-list'
+        }, 'Проверьте, что под ASGI асинхронны только горячие GET-маршруты'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncView:
+
+    def test_async_view_matches_sync(self, catalogue):
+        catalogue(titles=3, reviews=1, comments=1)
+        sync_view = TitleViewSet.as_view({'get': 'list'})
+        async_view = as_async_view(TitleViewSet.as_view({'get': 'list'}))
+        request = RequestFactory().get('/api/v1/titles/')
+        expected = sync_view(request).render()
+        response = async_to_sync(async_view)(
+            RequestFactory().get('/api/v1/titles/')
+        )
+        assert response.status_code == 200
+        assert response.content == expected.content, (
+            'Проверьте, что асинхронная вьюха отвечает так же, как синхронная'
+        )
@@ -0,0 +1,63 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.test import APIClient
+
+
+def token_client(token):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def obtain_token(user):
+    response = APIClient().post('/api/v1/auth/token/', {
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == 200
+    return response.json()['token']
+
+
+@pytest.mark.django_db
+class TestStatelessJWTAuthentication:
+
+    def test_user_is_built_from_token(self, catalogue, user,
+                                      django_assert_num_queries):
+        title, _ = catalogue()
+        client = token_client(obtain_token(user))
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # поля доступа пользователя + произведение, страница
+        with django_assert_num_queries(3):
+            assert client.get(url).status_code == 200
+        with django_assert_num_queries(2):
+            assert client.get(url).status_code == 200, (
+                'Проверьте, что пользователь из токена не читается из базы '
+                'на каждый запрос'
+            )
+
+    def test_role_change_applies_to_issued_token(self, admin):
+        client = token_client(obtain_token(admin))
+        data = {'name': 'Фильм', 'slug': 'films'}
+        assert client.post('/api/v1/categories/', data).status_code == 201
+        admin.role = 'user'
+        admin.save()
+        response = client.post(
+            '/api/v1/categories/', {'name': 'Книга', 'slug': 'books'}
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что смена роли сразу действует на выданные токены'
+        )
+
+    def test_deleted_user_token_is_rejected(self, user):
+        client = token_client(obtain_token(user))
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_profile_loads_full_user(self, user):
+        client = token_client(obtain_token(user))
+        response = client.patch('/api/v1/users/me/', {'bio': 'о себе'})
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+        user.refresh_from_db()
+        assert user.bio == 'о себе'
@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Review, Title, TitleStats
+
+REVIEWS_URL = '/api/v1/reviews/batch/'
+COMMENTS_URL = '/api/v1/comments/batch/'
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Книги', slug='books')
+    return [
+        Title.objects.create(name=f'Книга {i}', year=2000, category=category)
+        for i in range(30)
+    ]
+
+
+def statuses(response):
+    return [item['status'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestReviewBatch:
+
+    def test_results_per_item(self, user_client, user, titles):
+        Review.objects.create(
+            title=titles[0], author=user, text='было', score=5
+        )
+        response = user_client.post(REVIEWS_URL, {'items': [
+            {'title': titles[1].id, 'text': 'ок', 'score': 8},
+            {'title': titles[0].id, 'text': 'повтор', 'score': 8},
+            {'title': titles[2].id, 'text': 'плохая оценка', 'score': 11},
+            {'title': 10 ** 6, 'text': 'нет такого', 'score': 8},
+            {'title': titles[2].id, 'text': 'ок', 'score': 4},
+            {'title': titles[2].id, 'text': 'дубль в пакете', 'score': 4},
+        ]}, format='json')
+        assert response.status_code == 207
+        assert statuses(response) == [201, 409, 400, 404, 201, 409], (
+            'Проверьте, что пакет возвращает статус каждого элемента и '
+            'конфликт отзыва не отменяет остальные'
+        )
+        created = response.json()['results'][0]['data']
+        review = Review.objects.get(pk=created['id'])
+        assert (review.title_id, review.author_id) == (titles[1].id, user.id)
+        assert created['author'] == user.username
+
+    def test_derived_data_is_updated(self, user_client, titles):
+        user_client.post(REVIEWS_URL, {'items': [
+            {'title': titles[0].id, 'text': 'ок', 'score': 8},
+        ]}, format='json')
+        title = Title.objects.get(pk=titles[0].id)
+        assert (title.reviews_count, title.score_sum) == (1, 8), (
+            'Проверьте, что пакетная загрузка пересчитывает рейтинг'
+        )
+        assert TitleStats.objects.get(title=title).histogram[7] == 1
+        detail = user_client.get(f'/api/v1/titles/{title.id}/').json()
+        assert detail['rating'] == 8
+
+    def test_queries_do_not_grow_with_batch(self, user_client, titles):
+        counts = []
+        for batch in (titles[:2], titles[2:]):
+            with CaptureQueriesContext(connection) as queries:
+                response = user_client.post(REVIEWS_URL, {'items': [
+                    {'title': title.id, 'text': 'ок', 'score': 7}
+                    for title in batch
+                ]}, format='json')
+            assert set(statuses(response)) == {201}
+            counts.append(len(queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что проверки и вставка выполняются запросами '
+            'на весь пакет'
+        )
+
+    def test_limits(self, user_client, client, titles, settings):
+        settings.BATCH_MAX_ITEMS = 2
+        items = [{'title': titles[0].id, 'text': 'ок', 'score': 7}] * 3
+        response = user_client.post(
+            REVIEWS_URL, {'items': items}, format='json'
+        )
+        assert response.status_code == 400
+        response = user_client.post(
+            REVIEWS_URL, {'items': []}, format='json'
+        )
+        assert response.status_code == 400
+        response = client.post(
+            REVIEWS_URL, {'items': items[:1]}, content_type='application/json'
+        )
+        assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestCommentBatch:
+
+    def test_comments_batch(self, user_client, user, titles):
+        review = Review.objects.create(
+            title=titles[0], author=user, text='отзыв', score=5
+        )
+        updated_at = review.updated_at
+        response = user_client.post(COMMENTS_URL, {'items': [
+            {'review': review.id, 'text': 'первый'},
+            {'review': 10 ** 6, 'text': 'мимо'},
+            {'review': review.id, 'text': 'второй'},
+        ]}, format='json')
+        assert statuses(response) == [201, 404, 201]
+        results = response.json()['results']
+        for index, text in ((0, 'первый'), (2, 'второй')):
+            comment = Comment.objects.get(pk=results[index]['data']['id'])
+            assert comment.text == text, (
+                'Проверьте, что id в ответе соответствуют созданным '
+                'комментариям'
+            )
+        review.refresh_from_db()
+        assert review.updated_at > updated_at
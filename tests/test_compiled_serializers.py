@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from api.serializers import (CommentsSerializer, ListRetrieveTitleSerializer,
+                             ReviewSerializer)
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+from reviews.models import Comment, Review, Title, TitleStats
+
+
+def as_json(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False)
+
+
+def assert_parity(serializer_class, queryset, context=None):
+    '''Быстрый путь и обычный ListSerializer дают один и тот же JSON.'''
+    rows = list(queryset)
+    compiled = serializer_class(rows, many=True, context=context or {})
+    regular = serializers.ListSerializer(
+        rows, child=serializer_class(context=context or {}),
+        context=context or {},
+    )
+    assert isinstance(compiled, serializers.ListSerializer)
+    assert type(compiled) is not serializers.ListSerializer
+    assert as_json(compiled.data) == as_json(regular.data), (
+        f'Проверьте, что быстрый путь {serializer_class.__name__} '
+        'совпадает с обычной сериализацией'
+    )
+
+
+@pytest.mark.django_db
+class TestCompiledSerializers:
+
+    @pytest.fixture
+    def titles(self, catalogue):
+        first, review = catalogue(titles=6, reviews=3, comments=3)
+        # крайние случаи: без категории, без статистики, без жанров
+        Title.objects.filter(pk=first.pk).update(category=None)
+        TitleStats.objects.filter(title_id=first.pk).delete()
+        Title.objects.exclude(pk=first.pk).first().genre.clear()
+        return (
+            Title.objects.select_related('category', 'stats')
+            .prefetch_related('genre').order_by('id')
+        )
+
+    @pytest.mark.parametrize('include_stats', (False, True))
+    def test_titles(self, titles, include_stats):
+        assert_parity(
+            ListRetrieveTitleSerializer, titles,
+            {'include_stats': include_stats},
+        )
+
+    def test_reviews(self, titles):
+        assert_parity(ReviewSerializer, Review.objects.select_related(
+            'author'
+        ))
+
+    def test_comments(self, titles):
+        assert_parity(CommentsSerializer, Comment.objects.select_related(
+            'author'
+        ))
+
+    def test_endpoint_output(self, client, titles):
+        response = client.get('/api/v1/titles/?include=stats&limit=1')
+        item = response.json()['results'][0]
+        assert item['category'] is None
+        assert item['stats']['histogram'] is None
+        assert item['genre'] == [{'name': 'Жанр 0', 'slug': 'genre_0'}]
@@ -0,0 +1,58 @@
+import pytest
+from reviews.models import Comment, Review
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+
+    def assert_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.has_header('ETag'), (
+            f'Проверьте, что `{url}` возвращает заголовок ETag'
+        )
+        assert response.has_header('Last-Modified')
+        repeated = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert repeated.status_code == 304, (
+            f'Проверьте, что `{url}` отвечает 304 на совпавший ETag'
+        )
+        return response['ETag']
+
+    @pytest.mark.parametrize('url', (
+        '/api/v1/titles/',
+        '/api/v1/titles/{title}/',
+        '/api/v1/titles/{title}/reviews/',
+        '/api/v1/titles/{title}/reviews/{review}/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+    ))
+    def test_not_modified(self, client, catalogue, url):
+        title, review = catalogue(titles=3, reviews=3, comments=3)
+        self.assert_not_modified(
+            client, url.format(title=title.id, review=review.id)
+        )
+
+    def test_not_modified_skips_serialization(
+            self, client, catalogue, django_assert_num_queries):
+        title, _ = catalogue(titles=3, reviews=3, comments=3)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_review_change_updates_etag(self, client, user, catalogue):
+        title, _ = catalogue(titles=3, reviews=3, comments=3)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = self.assert_not_modified(client, url)
+        Review.objects.create(title=title, author=user, text='x', score=3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_comment_change_updates_etag(self, client, user, catalogue):
+        title, review = catalogue(titles=3, reviews=3, comments=3)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        etag = self.assert_not_modified(client, url)
+        Comment.objects.create(review=review, author=user, text='x')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
@@ -0,0 +1,156 @@
+import runpy
+from os.path import join
+
+import pytest
+from api.async_views import as_async_view
+from asgiref.sync import async_to_sync
+from core import db
+from django.db import connection, connections
+from django.test import RequestFactory
+
+from .conftest import root_dir
+
+SETTINGS_PATH = join(root_dir, 'api_yamdb', 'api_yamdb', 'settings.py')
+
+
+def load_settings(monkeypatch, **env):
+    for name in ('DB_ENGINE', 'DB_CONN_MAX_AGE', 'DB_POOL'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(SETTINGS_PATH)
+
+
+class FakeConnection:
+
+    def __init__(self, usable, health_checks=True):
+        self.connection = object()
+        self.settings_dict = {'CONN_HEALTH_CHECKS': health_checks}
+        self.usable = usable
+        self.pings = 0
+
+    def is_usable(self):
+        self.pings += 1
+        return self.usable
+
+    def close(self):
+        self.connection = None
+
+
+class TestConnectionSettings:
+
+    def test_persistent_connections_by_default(self, monkeypatch):
+        database = load_settings(monkeypatch)['DATABASES']['default']
+        assert database['ENGINE'] == 'django.db.backends.postgresql'
+        assert database['CONN_MAX_AGE'] == 60
+        assert database['CONN_HEALTH_CHECKS'] is True
+
+    def test_pool(self, monkeypatch):
+        database = load_settings(
+            monkeypatch, DB_POOL='True', DB_POOL_MAX_SIZE='8'
+        )['DATABASES']['default']
+        assert database['ENGINE'] == 'core.backends.postgresql'
+        assert database['CONN_MAX_AGE'] == 0, (
+            'Проверьте, что пул не сочетается с CONN_MAX_AGE'
+        )
+        assert database['OPTIONS']['pool']['max_size'] == 8
+
+
+class TestHealthChecks:
+
+    def test_unusable_connection_is_closed_on_first_use(self, monkeypatch):
+        broken, alive, unchecked = (
+            FakeConnection(False), FakeConnection(True),
+            FakeConnection(False, health_checks=False),
+        )
+        monkeypatch.setattr(db, 'connections', type('Handler', (), {
+            'all': staticmethod(lambda: [broken, alive, unchecked]),
+        }))
+        db.schedule_health_checks()
+        assert (broken.pings, alive.pings) == (0, 0), (
+            'Проверьте, что в начале запроса соединения не проверяются'
+        )
+        for wrapper in (broken, alive, unchecked, broken, alive):
+            db.close_if_health_check_failed(wrapper)
+        assert broken.connection is None, (
+            'Проверьте, что неработающее соединение закрывается до запроса'
+        )
+        assert alive.connection is not None
+        assert unchecked.connection is not None
+        assert (broken.pings, alive.pings, unchecked.pings) == (1, 1, 0), (
+            'Проверьте, что соединение проверяется один раз за запрос'
+        )
+
+    @pytest.mark.skipif(
+        'replica' not in connections.databases,
+        reason='Нужна база replica (SQLite в тестах без DB_HOST)',
+    )
+    @pytest.mark.django_db(databases=['default', 'replica'])
+    def test_only_used_alias_is_pinged(self, monkeypatch):
+        pings = []
+        for alias in ('default', 'replica'):
+            wrapper = connections[alias]
+            wrapper.ensure_connection()
+            monkeypatch.setitem(
+                wrapper.settings_dict, 'CONN_HEALTH_CHECKS', True
+            )
+            monkeypatch.setattr(
+                wrapper, 'is_usable',
+                lambda alias=alias: pings.append(alias) or True
+            )
+        db.schedule_health_checks()
+        for _ in range(2):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        assert pings == ['default'], (
+            'Проверьте, что проверяется только используемое соединение '
+            'и только один раз'
+        )
+
+    def test_async_view_schedules_checks(self):
+        class Rendered:
+            def render(self):
+                return self
+
+        def view(request):
+            response = Rendered()
+            response.scheduled = [
+                getattr(wrapper, 'health_check_done', True) is False
+                for wrapper in connections.all()
+            ]
+            return response
+
+        response = async_to_sync(as_async_view(view))(
+            RequestFactory().get('/')
+        )
+        assert response.scheduled and all(response.scheduled), (
+            'Проверьте, что проверка назначается и в потоке '
+            'асинхронной вьюхи'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPool:
+
+    def test_connection_is_reused(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Пул работает только с PostgreSQL')
+        from core.backends.postgresql.base import DatabaseWrapper
+        settings_dict = {
+            **connection.settings_dict, 'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'pool': {'min_size': 1, 'max_size': 1}},
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias='pool_test')
+        wrapper.ensure_connection()
+        first = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+        assert wrapper.connection is first, (
+            'Проверьте, что закрытое соединение возвращается в пул'
+        )
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            assert cursor.fetchone() == (1,)
+        wrapper.close()
+        wrapper.pool.closeall()
@@ -0,0 +1,77 @@
+import csv
+import datetime as dt
+import io
+import json
+
+import pytest
+from django.utils import timezone
+from reviews.models import Comment, Title
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def ndjson(response):
+    return [json.loads(line) for line in content(response).splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_admin_only(self, client, user_client):
+        url = '/api/v1/export/titles/'
+        assert client.get(url).status_code == 401
+        assert user_client.get(url).status_code == 403, (
+            'Проверьте, что выгрузка доступна только администратору'
+        )
+
+    def test_titles_ndjson(self, admin_client, catalogue, settings,
+                           django_assert_num_queries):
+        settings.EXPORT_CHUNK_SIZE = 8
+        first, _ = catalogue(titles=20, reviews=2, comments=0)
+        response = admin_client.get('/api/v1/export/titles/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        # строки произведений и по запросу жанров на каждую из трёх пачек
+        with django_assert_num_queries(4):
+            rows = ndjson(response)
+        assert [row['id'] for row in rows] == sorted(
+            Title.objects.values_list('pk', flat=True)
+        )
+        row = rows[0]
+        assert row['id'] == first.id
+        assert row['category'] == 'films'
+        assert row['genres'] == ['genre_0']
+        assert (row['rating'], row['reviews_count']) == (7, 2)
+
+    def test_reviews_csv(self, admin_client, catalogue):
+        catalogue(titles=1, reviews=3, comments=0)
+        response = admin_client.get('/api/v1/export/reviews/?format=csv')
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        assert len(rows) == 3
+        assert rows[0]['author'] == 'author_0'
+        assert rows[0]['score'] == '7'
+
+    def test_updated_since(self, admin_client, catalogue):
+        catalogue(titles=1, reviews=1, comments=3)
+        since = timezone.now()
+        old = Comment.objects.values('pk')[:2]
+        Comment.objects.filter(pk__in=old).update(
+            updated_at=since - dt.timedelta(days=1)
+        )
+        response = admin_client.get(
+            '/api/v1/export/comments/',
+            {'updated_since': (since - dt.timedelta(hours=1)).isoformat()}
+        )
+        assert len(ndjson(response)) == 1, (
+            'Проверьте, что `updated_since` оставляет только изменённые '
+            'строки'
+        )
+        watermark = dt.datetime.fromisoformat(response['X-Export-Watermark'])
+        assert watermark >= since
+        response = admin_client.get(
+            '/api/v1/export/reviews/?updated_since=вчера'
+        )
+        assert response.status_code == 400
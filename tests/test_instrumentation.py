@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from core.instrumentation import current_stats
+from core.middleware import InstrumentationMiddleware
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+
+
+@pytest.mark.django_db
+class TestInstrumentation:
+
+    def test_server_timing_header(self, client, catalogue, settings):
+        settings.SERVER_TIMING = True
+        catalogue(titles=3, reviews=1, comments=1)
+        response = client.get('/api/v1/titles/')
+        timing = response['Server-Timing']
+        assert re.match(
+            r'db;dur=[\d.]+;desc="4 queries", serialize;dur=[\d.]+, '
+            r'total;dur=[\d.]+$', timing
+        ), f'Проверьте заголовок Server-Timing: {timing}'
+
+    def test_server_timing_disabled_by_default(self, client):
+        response = client.get('/api/v1/titles/')
+        assert not response.has_header('Server-Timing')
+
+    def test_metrics_histograms_per_action(self, client, catalogue):
+        title, _ = catalogue(titles=1, reviews=1, comments=1)
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{title.id}/reviews/')
+        metrics = client.get('/metrics').content.decode()
+        for view in ('TitleViewSet.list', 'ReviewViewSet.list'):
+            assert re.search(
+                r'yamdb_request_duration_seconds_count'
+                rf'{{view="{view}",method="GET"}} [1-9]', metrics
+            ), f'Проверьте, что /metrics содержит гистограмму для {view}'
+        assert 'yamdb_db_queries_bucket{view="TitleViewSet.list"' in metrics
+
+    def test_query_budget_warning(self, client, catalogue, settings, caplog):
+        settings.REQUEST_QUERY_BUDGET = 2
+        catalogue(titles=1, reviews=1, comments=1)
+        with caplog.at_level(logging.WARNING, logger='yamdb.performance'):
+            client.get('/api/v1/titles/')
+        assert 'TitleViewSet.list' in caplog.text, (
+            'Проверьте, что запросы сверх бюджета попадают в лог'
+        )
+
+
+class TestAsyncMiddleware:
+
+    def test_async_chain_stays_coroutine(self, settings):
+        settings.SERVER_TIMING = True
+        seen = []
+
+        async def get_response(request):
+            seen.append(current_stats.get())
+            return HttpResponse()
+
+        middleware = InstrumentationMiddleware(get_response)
+        assert asyncio.iscoroutinefunction(middleware), (
+            'Проверьте, что под ASGI middleware не переключается в поток'
+        )
+        response = asyncio.run(middleware(RequestFactory().get('/')))
+        assert seen[0] is not None, (
+            'Проверьте, что статистика запроса доступна во вьюхе под ASGI'
+        )
+        assert current_stats.get() is None
+        assert response.has_header('Server-Timing')
+
+    @pytest.mark.django_db
+    def test_asgi_request(self, catalogue, settings):
+        settings.SERVER_TIMING = True
+        catalogue(titles=3, reviews=1, comments=1)
+        response = async_to_sync(AsyncClient().get)('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'desc="4 queries"' in response['Server-Timing'], (
+            'Проверьте, что запросы под ASGI учитываются в Server-Timing'
+        )
@@ -0,0 +1,205 @@
+from concurrent.futures import Future
+
+import pytest
+from core.management.commands import loadfromfile
+from core.management.commands.loadfromfile import (copy_buffer,
+                                                   file_dependencies)
+from django.core.management import call_command
+from django.db import connection
+from reviews.models import Comment, Review, Title
+
+CSV_FILES = {
+    'category.csv': 'id,name,slug\n1,Фильм,movie\n2,Книга,book\n',
+    'genre.csv': 'id,name,slug\n1,Драма,drama\n2,Комедия,comedy\n',
+    'titles.csv': 'id,name,year,category\n1,Шоушенк,1994,1\n2,Побег,2000,\n',
+    'genre_title.csv': 'id,title_id,genre_id\n1,1,1\n2,1,2\n3,2,2\n',
+    'users.csv': (
+        'id,username,email,role,bio,first_name,last_name\n'
+        '100,bingobongo,bingobongo@yamdb.fake,user,,,\n'
+        '101,capt_obvious,capt@yamdb.fake,admin,,,\n'
+    ),
+    'review.csv': (
+        'id,title_id,text,author,score,pub_date\n'
+        '1,1,Отлично,100,10,2019-09-24T21:08:21.567Z\n'
+        '2,1,Неплохо,101,5,2019-09-24T21:08:21.567Z\n'
+        '3,99,Нет произведения,101,5,2019-09-24T21:08:21.567Z\n'
+    ),
+    'comments.csv': (
+        'id,review_id,text,author,pub_date\n'
+        '1,1,Согласен,101,2019-09-24T21:08:21.567Z\n'
+    ),
+}
+
+
+@pytest.fixture
+def csv_dir(tmp_path):
+    for name, content in CSV_FILES.items():
+        (tmp_path / name).write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestLoadFromFile:
+
+    def test_load(self, csv_dir, capsys):
+        call_command('loadfromfile', path=str(csv_dir), batch_size=2)
+        title = Title.objects.get(pk=1)
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }, 'Проверьте, что загружается связь произведений и жанров'
+        assert Title.objects.get(pk=2).category is None
+        assert Review.objects.count() == 2
+        assert Comment.objects.count() == 1
+        assert (title.reviews_count, title.score_sum) == (2, 15), (
+            'Проверьте, что после загрузки отзывов пересчитан рейтинг'
+        )
+        assert 'Skip 1 Review rows' in capsys.readouterr().err
+
+    def test_reload_updates(self, csv_dir, capsys):
+        call_command('loadfromfile', path=str(csv_dir))
+        (csv_dir / 'titles.csv').write_text(
+            'id,name,year,category\n1,Зелёная миля,1999,2\n',
+            encoding='utf-8'
+        )
+        call_command('loadfromfile', path=str(csv_dir))
+        title = Title.objects.get(pk=1)
+        assert (title.name, title.category_id) == ('Зелёная миля', 2)
+        assert 'Update Title: 0 created, 1 updated' in capsys.readouterr().out
+
+    @pytest.mark.parametrize('use_copy', (True, False))
+    def test_reload_keeps_ratings(self, csv_dir, tmp_path_factory,
+                                  use_copy):
+        call_command('loadfromfile', path=str(csv_dir), use_copy=use_copy)
+        before = Title.objects.values(
+            'rating', 'ranking', 'score_sum', 'reviews_count', 'updated_at'
+        ).get(pk=1)
+        titles_dir = tmp_path_factory.mktemp('titles')
+        (titles_dir / 'titles.csv').write_text(
+            CSV_FILES['titles.csv'].replace('Шоушенк', 'Зелёная миля'),
+            encoding='utf-8'
+        )
+        call_command('loadfromfile', path=str(titles_dir), use_copy=use_copy)
+        after = Title.objects.values(
+            'rating', 'ranking', 'score_sum', 'reviews_count', 'updated_at'
+        ).get(pk=1)
+        assert after['updated_at'] > before.pop('updated_at'), (
+            'Проверьте, что перезагрузка обновляет updated_at'
+        )
+        del after['updated_at']
+        assert after == before, (
+            'Проверьте, что перезагрузка не сбрасывает колонки, '
+            'которых нет в csv'
+        )
+
+    def test_reload_invalidates_responses(self, csv_dir, client):
+        call_command('loadfromfile', path=str(csv_dir))
+        url = '/api/v1/titles/1/'
+        etag = client.get(url)['ETag']
+        client.get('/api/v1/titles/')
+        (csv_dir / 'titles.csv').write_text(
+            'id,name,year,category\n1,Зелёная миля,1999,1\n',
+            encoding='utf-8'
+        )
+        call_command('loadfromfile', path=str(csv_dir))
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после перезагрузки меняется ETag'
+        )
+        assert response.json()['name'] == 'Зелёная миля'
+        names = [
+            title['name']
+            for title in client.get('/api/v1/titles/').json()['results']
+        ]
+        assert 'Зелёная миля' in names, (
+            'Проверьте, что перезагрузка сбрасывает кэш ответов'
+        )
+
+    def test_copy_keeps_nulls(self, csv_dir):
+        if connection.vendor != 'postgresql':
+            pytest.skip('COPY работает только с PostgreSQL')
+        call_command('loadfromfile', path=str(csv_dir), use_copy=True)
+        title = Title.objects.get(pk=2)
+        assert (title.category_id, title.rating) == (None, None), (
+            'Проверьте, что пустые значения загружаются через COPY как NULL'
+        )
+        assert title.description == '', (
+            'Проверьте, что пустая строка не превращается в NULL'
+        )
+
+
+class InlineExecutor:
+    """Пул, выполняющий задачи сразу в текущем процессе и соединении."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, function, *args):
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+@pytest.mark.django_db
+class TestLoadParallel:
+
+    @pytest.fixture(autouse=True)
+    def inline_pool(self, monkeypatch):
+        monkeypatch.setattr(
+            loadfromfile, 'ProcessPoolExecutor', InlineExecutor
+        )
+
+    def test_load(self, csv_dir):
+        call_command('loadfromfile', path=str(csv_dir), workers=2)
+        assert Title.objects.get(pk=1).genre.count() == 2
+        assert (Review.objects.count(), Comment.objects.count()) == (2, 1), (
+            'Проверьте, что с --workers загружаются все файлы'
+        )
+
+    def test_missing_files_reported(self, tmp_path, capsys):
+        call_command('loadfromfile', path=str(tmp_path), workers=2)
+        err = capsys.readouterr().err
+        for filename, _ in loadfromfile.model_by_filename:
+            assert f'{filename}.csv not found' in err, (
+                'Проверьте, что с --workers сообщается о каждом '
+                'отсутствующем файле'
+            )
+
+    def test_failed_dependency_skips_dependents(self, csv_dir, capsys):
+        (csv_dir / 'titles.csv').write_text(
+            'id,name,year,category\nx,Шоушенк,1994,1\n', encoding='utf-8'
+        )
+        call_command('loadfromfile', path=str(csv_dir), workers=2)
+        err = capsys.readouterr().err
+        assert 'Not load genre_title. Failed dependencies: titles.' in err
+        assert 'Not load review. Failed dependencies: titles.' in err
+        assert 'Not load comments. Failed dependencies: review.' in err
+        assert not Review.objects.exists(), (
+            'Проверьте, что файлы с упавшими зависимостями не загружаются'
+        )
+
+
+class TestCopyBuffer:
+
+    def test_none_is_null_marker(self):
+        buffer = copy_buffer([[2, 'Побег', None, ''], [3, '"А"', 1.5, None]])
+        assert buffer.read().splitlines() == [
+            '2,Побег,\\N,', '3,"""А""",1.5,\\N'
+        ], 'Проверьте, что None записывается маркером NULL, а не ""'
+
+
+class TestFileDependencies:
+
+    def test_dependencies_follow_foreign_keys(self):
+        dependencies = file_dependencies()
+        assert dependencies['category'] == set()
+        assert dependencies['users'] == set()
+        assert dependencies['titles'] == {'category'}
+        assert dependencies['genre_title'] == {'titles', 'genre'}
+        assert dependencies['review'] == {'titles', 'users'}
+        assert dependencies['comments'] == {'review', 'users'}
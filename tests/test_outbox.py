@@ -0,0 +1,112 @@
+import smtplib
+
+import pytest
+from core.models import OutboxMessage
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise smtplib.SMTPServerDisconnected('relay is down')
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_confirmation(self, client):
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'new_user', 'email': 'new_user@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        message = OutboxMessage.objects.get()
+        assert message.recipients == ['new_user@yamdb.fake']
+        assert message.status == OutboxMessage.PENDING
+
+    def test_worker_sends_pending_messages(self):
+        for i in range(3):
+            OutboxMessage.objects.enqueue(
+                'subject', f'code {i}', [f'user_{i}@yamdb.fake']
+            )
+        call_command('send_outbox', '--once', '--batch-size', '2')
+        assert len(mail.outbox) == 3
+        assert not OutboxMessage.objects.pending().exists(), (
+            'Проверьте, что воркер отправляет всю очередь пачками'
+        )
+
+    def test_worker_retries_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingBackend'
+        message = OutboxMessage.objects.enqueue('subject', 'code', ['a@b.c'])
+        call_command('send_outbox', '--once', '--max-attempts', '2')
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.PENDING
+        assert message.attempts == 1
+        assert message.next_attempt_at > message.created_at, (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        assert 'relay is down' in message.last_error
+
+        OutboxMessage.objects.update(next_attempt_at=message.created_at)
+        call_command('send_outbox', '--once', '--max-attempts', '2')
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.FAILED
+
+
+class RecordingBackend(BaseEmailBackend):
+    '''Запоминает, в каком состоянии база во время отправки.'''
+    seen = []
+
+    def send_messages(self, email_messages):
+        self.seen.append((
+            transaction.get_connection().in_atomic_block,
+            list(OutboxMessage.objects.values_list('status', flat=True)),
+        ))
+        return len(email_messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOutboxWorker:
+
+    def test_sends_outside_transaction(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.RecordingBackend'
+        RecordingBackend.seen.clear()
+        OutboxMessage.objects.enqueue('subject', 'code 1', ['a@b.c'])
+        call_command('send_outbox', '--once')
+        assert RecordingBackend.seen == [(False, [OutboxMessage.SENDING])], (
+            'Проверьте, что письма забираются коммитом и отправляются '
+            'без открытой транзакции и блокировок'
+        )
+        message = OutboxMessage.objects.get()
+        assert message.status == OutboxMessage.SENT
+        assert message.body == '', (
+            'Проверьте, что код подтверждения удаляется после отправки'
+        )
+
+    def test_expired_claim_is_due_again(self):
+        message = OutboxMessage.objects.enqueue('subject', 'code', ['a@b.c'])
+        assert OutboxMessage.objects.claim(10, lease=600) == [message]
+        assert OutboxMessage.objects.claim(10, lease=600) == [], (
+            'Проверьте, что забранное письмо не отправляется дважды'
+        )
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        assert OutboxMessage.objects.claim(10, lease=600) == [message], (
+            'Проверьте, что письма упавшего воркера отправляются снова'
+        )
+
+    def test_metrics(self, client):
+        for i in range(3):
+            OutboxMessage.objects.enqueue('subject', 'code', ['a@b.c'])
+        call_command('send_outbox', '--once')
+        OutboxMessage.objects.enqueue('subject', 'code', ['a@b.c'])
+        metrics = client.get('/metrics').content.decode()
+        assert 'yamdb_outbox_messages_total{result="sent"} 3' in metrics, (
+            'Проверьте, что итоги отправки попадают в /metrics'
+        )
+        assert 'yamdb_outbox_depth{status="pending"} 1' in metrics
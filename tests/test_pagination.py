@@ -0,0 +1,106 @@
+import pytest
+from core.models import Counter
+from reviews.models import Comment, Title
+
+
+def collect_pages(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в курсорном режиме не считается count'
+        )
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_reviews_cursor_matches_offset(self, client, catalogue):
+        title, _ = catalogue()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        offset_ids = [
+            item['id']
+            for item in client.get(f'{url}?limit=100').json()['results']
+        ]
+        assert collect_pages(client, f'{url}?cursor=&limit=3') == offset_ids
+
+    def test_comments_cursor_matches_offset(self, client, catalogue):
+        title, review = catalogue()
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        offset_ids = [
+            item['id']
+            for item in client.get(f'{url}?limit=100').json()['results']
+        ]
+        assert collect_pages(client, f'{url}?cursor=&limit=7') == offset_ids
+
+    def test_titles_cursor_matches_offset(self, client, catalogue):
+        catalogue()
+        offset_ids = [
+            item['id'] for item in
+            client.get('/api/v1/titles/?limit=100').json()['results']
+        ]
+        assert collect_pages(
+            client, '/api/v1/titles/?cursor=&limit=4'
+        ) == offset_ids
+
+    def test_offset_is_default(self, client, catalogue):
+        catalogue()
+        data = client.get('/api/v1/titles/').json()
+        assert data['count'] == 20
+        assert len(data['results']) == 5
+
+
+@pytest.mark.django_db
+class TestMaintainedCounts:
+
+    def test_counts_follow_changes(self, user_client, catalogue):
+        title, review = catalogue(titles=3, reviews=4, comments=4)
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        assert user_client.get(reviews_url).json()['count'] == 4
+        assert user_client.get(comments_url).json()['count'] == 4
+        created = user_client.post(comments_url, {'text': 'ещё'}).json()
+        assert user_client.get(comments_url).json()['count'] == 5
+        Comment.objects.get(pk=created['id']).delete()
+        assert user_client.get(comments_url).json()['count'] == 4, (
+            'Проверьте, что count комментариев следует за удалением'
+        )
+        Title.objects.exclude(pk=title.pk).first().delete()
+        assert user_client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что count произведений следует за удалением'
+        )
+
+    def test_filtered_titles_are_counted(self, client, catalogue):
+        catalogue(titles=6, reviews=0, comments=0)
+        data = client.get('/api/v1/titles/?genre=genre_2').json()
+        assert data['count'] == Title.objects.filter(
+            genre__slug='genre_2'
+        ).count() == 2
+
+    def test_missing_counter_falls_back_to_count(self, client, catalogue,
+                                                 django_assert_num_queries):
+        catalogue(titles=6, reviews=0, comments=0)
+        Counter.objects.filter(name=Title.COUNTER).delete()
+        # валидаторы ETag вместе с COUNT, страница, жанры
+        with django_assert_num_queries(4):
+            data = client.get('/api/v1/titles/').json()
+        assert data['count'] == 6
+        Title.objects.all().reset_counter()
+        assert Counter.objects.value(Title.COUNTER) == 6
+
+    def test_batch_comments_update_counter(self, user_client, catalogue):
+        title, review = catalogue(titles=1, reviews=1, comments=1)
+        user_client.post('/api/v1/comments/batch/', {'items': [
+            {'review': review.id, 'text': 'первый'},
+            {'review': review.id, 'text': 'второй'},
+        ]}, format='json')
+        review.refresh_from_db()
+        assert review.comments_count == 3, (
+            'Проверьте, что пакетная загрузка пересчитывает число '
+            'комментариев'
+        )
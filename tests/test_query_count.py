@@ -0,0 +1,113 @@
+import pytest
+from reviews.models import Title
+
+PAGE_SIZES = (1, 5, 20)
+
+
+@pytest.mark.django_db
+class TestListQueryCount:
+
+    @pytest.mark.parametrize('limit', PAGE_SIZES)
+    def test_titles_list(self, client, catalogue,
+                         django_assert_num_queries, limit):
+        catalogue()
+        # счётчик произведений, валидаторы ETag, страница с категориями, жанры
+        with django_assert_num_queries(4):
+            response = client.get(f'/api/v1/titles/?limit={limit}')
+        assert response.status_code == 200
+        assert len(response.json()['results']) == limit, (
+            'Проверьте, что эндпоинт `/api/v1/titles/` учитывает `limit`'
+        )
+
+    @pytest.mark.parametrize('limit', PAGE_SIZES)
+    def test_reviews_list(self, client, catalogue,
+                          django_assert_num_queries, limit):
+        title, _ = catalogue()
+        # произведение со счётчиком отзывов, страница отзывов с авторами
+        with django_assert_num_queries(2):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/?limit={limit}'
+            )
+        assert response.status_code == 200
+        assert len(response.json()['results']) == limit
+
+    @pytest.mark.parametrize('limit', PAGE_SIZES)
+    def test_comments_list(self, client, catalogue,
+                           django_assert_num_queries, limit):
+        title, review = catalogue()
+        # отзыв со счётчиком комментариев, страница комментариев с авторами
+        with django_assert_num_queries(2):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+                f'?limit={limit}'
+            )
+        assert response.status_code == 200
+        assert len(response.json()['results']) == limit
+
+    @pytest.mark.parametrize('url', ('/api/v1/categories/',
+                                     '/api/v1/genres/'))
+    @pytest.mark.parametrize('limit', PAGE_SIZES)
+    def test_slug_lists(self, client, catalogue,
+                        django_assert_num_queries, url, limit):
+        catalogue()
+        with django_assert_num_queries(2):
+            response = client.get(f'{url}?limit={limit}')
+        assert response.status_code == 200
+
+    def test_users_list(self, admin_client, catalogue,
+                        django_assert_num_queries):
+        catalogue()
+        # PageNumberPagination: count и страница пользователей
+        with django_assert_num_queries(2):
+            response = admin_client.get('/api/v1/users/')
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+class TestNestedQueryCount:
+
+    def test_review_create(self, user_client, catalogue,
+                           django_assert_num_queries):
+        title, _ = catalogue(reviews=1, comments=0)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        # произведение с проверкой «один отзыв», savepoint, вставка,
+        # рейтинг, гистограмма, release
+        with django_assert_num_queries(6):
+            response = user_client.post(url, {'text': 'отзыв', 'score': 5})
+        assert response.status_code == 201
+        with django_assert_num_queries(1):
+            response = user_client.post(url, {'text': 'отзыв', 'score': 5})
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв отклоняется'
+        )
+
+    def test_review_detail(self, client, catalogue,
+                           django_assert_num_queries):
+        title, review = catalogue(reviews=1, comments=0)
+        with django_assert_num_queries(1):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+            )
+        assert response.status_code == 200
+
+    def test_comment_create(self, user_client, catalogue,
+                            django_assert_num_queries):
+        title, review = catalogue(reviews=1, comments=0)
+        # отзыв с проверкой произведения, вставка, updated_at отзыва
+        with django_assert_num_queries(3):
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+                {'text': 'комментарий'}
+            )
+        assert response.status_code == 201
+
+    def test_review_of_other_title(self, user_client, catalogue):
+        title, review = catalogue(titles=2, reviews=1, comments=1)
+        other = Title.objects.exclude(pk=title.pk).first()
+        url = f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        assert user_client.get(url).status_code == 404, (
+            'Проверьте, что комментарии доступны только по произведению '
+            'отзыва'
+        )
+        response = user_client.post(url, {'text': 'комментарий'})
+        assert response.status_code == 404
@@ -0,0 +1,155 @@
+import itertools
+import json
+
+import pytest
+from api.views import CategoryViewSet, GenreViewSet, TitleViewSet, UserViewSet
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from reviews.models import Category, Genre, Title, User
+
+# Последовательное чтение таблиц меньше порога считаем допустимым.
+SEQ_SCAN_ROW_THRESHOLD = 1000
+PAGE_SIZE = 10
+
+TITLES = 20000
+CATEGORIES = 50
+GENRES = 30
+USERS = 5000
+WORDS = ('звезда', 'тень', 'город', 'море', 'ночь', 'песня', 'дорога',
+         'король', 'сердце', 'огонь', 'зима', 'остров', 'тайна', 'река')
+
+TITLE_FILTERS = {
+    'name': 'ночь тень',
+    'year': '2001',
+    'category': 'category_3',
+    'genre': 'genre_5',
+    'search': 'король',
+}
+
+
+def title_filter_combinations():
+    for size in range(1, len(TITLE_FILTERS) + 1):
+        for names in itertools.combinations(TITLE_FILTERS, size):
+            yield {name: TITLE_FILTERS[name] for name in names}
+
+
+@pytest.fixture(scope='module')
+def plan_data(django_db_setup, django_db_blocker):
+    '''Наполняет базу так, чтобы планировщик выбирал реальные планы.'''
+    if connection.vendor != 'postgresql':
+        pytest.skip('EXPLAIN проверяется только на PostgreSQL')
+    with django_db_blocker.unblock():
+        categories = Category.objects.bulk_create(
+            Category(name=f'Category {i}', slug=f'category_{i}')
+            for i in range(CATEGORIES)
+        )
+        genres = Genre.objects.bulk_create(
+            Genre(name=f'Genre {i}', slug=f'genre_{i}') for i in range(GENRES)
+        )
+        titles = Title.objects.bulk_create(
+            Title(
+                name=' '.join(
+                    WORDS[(i + shift) % len(WORDS)] for shift in (0, 3, 7)
+                ) + f' {i}',
+                year=1950 + i % 70,
+                description=WORDS[i % len(WORDS)],
+                category=categories[i % CATEGORIES],
+            )
+            for i in range(TITLES)
+        )
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(
+                title_id=title.id, genre_id=genres[(i + shift) % GENRES].id
+            )
+            for i, title in enumerate(titles)
+            for shift in (0, 11)
+        )
+        User.objects.bulk_create(
+            User(username=f'user_{i}', email=f'user_{i}@yamdb.fake')
+            for i in range(USERS)
+        )
+        Title.objects.update_search_vector()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        yield
+        Title.objects.all().delete()
+        Category.objects.all().delete()
+        Genre.objects.all().delete()
+        User.objects.all().delete()
+
+
+def list_queryset(viewset, params):
+    '''Запрос страницы списка так, как его строит вьюсет.'''
+    view = viewset()
+    view.request = Request(APIRequestFactory().get('/', params))
+    view.format_kwarg = None
+    view.action = 'list'
+    view.args = ()
+    view.kwargs = {}
+    return view.filter_queryset(view.get_queryset())[:PAGE_SIZE]
+
+
+def relation_sizes():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+        )
+        return dict(cursor.fetchall())
+
+
+def seq_scans(plan):
+    if plan['Node Type'] == 'Seq Scan':
+        yield plan['Relation Name']
+    for child in plan.get('Plans', ()):
+        yield from seq_scans(child)
+
+
+def assert_no_large_seq_scan(queryset, description):
+    plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+    sizes = relation_sizes()
+    large = [
+        table for table in seq_scans(plan)
+        if sizes.get(table, 0) > SEQ_SCAN_ROW_THRESHOLD
+    ]
+    assert not large, (
+        f'Проверьте индексы: запрос {description} последовательно читает '
+        f'таблицы {large}. План: {json.dumps(plan, ensure_ascii=False)}'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('plan_data')
+class TestQueryPlans:
+
+    @pytest.mark.parametrize(
+        'params', list(title_filter_combinations()),
+        ids=lambda params: '+'.join(params)
+    )
+    def test_title_filters_use_indexes(self, params):
+        assert_no_large_seq_scan(
+            list_queryset(TitleViewSet, params), f'/titles/?{params}'
+        )
+
+    @pytest.mark.parametrize('ordering', (
+        '-ranking', 'ranking', '-rating', 'rating', '-reviews_count',
+        'reviews_count', '-year', 'year',
+    ))
+    @pytest.mark.parametrize('params', (
+        {}, {'category': 'category_3'}, {'genre': 'genre_5'},
+    ), ids=lambda params: '+'.join(params) or 'all')
+    def test_title_ordering_uses_indexes(self, ordering, params):
+        params = {**params, 'ordering': ordering}
+        assert_no_large_seq_scan(
+            list_queryset(TitleViewSet, params), f'/titles/?{params}'
+        )
+
+    @pytest.mark.parametrize('viewset, params', (
+        (UserViewSet, {'search': 'user_123'}),
+        (CategoryViewSet, {'search': 'category 3'}),
+        (GenreViewSet, {'search': 'genre 5'}),
+    ))
+    def test_search_uses_indexes(self, viewset, params):
+        assert_no_large_seq_scan(
+            list_queryset(viewset, params), f'{viewset.__name__} {params}'
+        )
@@ -0,0 +1,92 @@
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db
+class TestRatingSignals:
+
+    @pytest.fixture
+    def title(self):
+        category = Category.objects.create(name='Книги', slug='books')
+        return Title.objects.create(name='Книга', year=2000, category=category)
+
+    def stored(self, title):
+        return Title.objects.values(
+            'score_sum', 'reviews_count', 'rating'
+        ).get(pk=title.pk)
+
+    def test_stale_copies_use_stored_score(self, title, user, admin):
+        Review.objects.create(title=title, author=admin, text='x', score=5)
+        review = Review.objects.create(
+            title=title, author=user, text='x', score=5
+        )
+        first, second = (Review.objects.get(pk=review.pk) for _ in range(2))
+        first.score = 7
+        first.save()
+        second.score = 9
+        second.save()
+        assert self.stored(title) == {
+            'score_sum': 14, 'reviews_count': 2, 'rating': 7.0
+        }, 'Проверьте, что изменение считается от оценки в базе'
+        assert not Title.objects.with_inconsistent_rating().exists()
+
+    def test_stale_copy_of_only_review(self, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='x', score=5
+        )
+        stale = Review.objects.get(pk=review.pk)
+        review.score = 1
+        review.save()
+        stale.score = 2
+        stale.save()
+        assert self.stored(title)['score_sum'] == 2
+
+    def test_double_delete_counts_once(self, title, user, admin):
+        Review.objects.create(title=title, author=admin, text='x', score=4)
+        review = Review.objects.create(
+            title=title, author=user, text='x', score=6
+        )
+        stale = Review.objects.get(pk=review.pk)
+        review.delete()
+        assert stale.delete() == (0, {}), (
+            'Проверьте, что удалённый отзыв не удаляется повторно'
+        )
+        assert self.stored(title) == {
+            'score_sum': 4, 'reviews_count': 1, 'rating': 4.0
+        }, 'Проверьте, что повторное удаление не меняет рейтинг'
+
+
+@pytest.mark.django_db
+class TestRecalculateRatings:
+
+    @pytest.fixture
+    def title(self, catalogue):
+        title, _ = catalogue(titles=2, reviews=3, comments=0)
+        return title
+
+    def test_check_passes(self, title, capsys):
+        call_command('recalculate_ratings', check=True)
+        assert 'All ratings are valid.' in capsys.readouterr().out
+
+    @pytest.mark.parametrize('changes', (
+        {'score_sum': 1}, {'reviews_count': 1}, {'rating': 1.0},
+        {'rating': None},
+    ))
+    def test_check_finds_stale(self, title, changes):
+        Title.objects.filter(pk=title.pk).update(**changes)
+        with pytest.raises(CommandError, match=str(title.pk)):
+            call_command('recalculate_ratings', check=True)
+        call_command('recalculate_ratings')
+        assert not Title.objects.with_inconsistent_rating().exists(), (
+            'Проверьте, что recalculate_ratings исправляет рейтинг'
+        )
+
+    def test_rating_without_reviews_is_stale(self, title):
+        empty = Title.objects.exclude(pk=title.pk).get()
+        Title.objects.filter(pk=empty.pk).update(rating=5.0)
+        assert list(
+            Title.objects.with_inconsistent_rating().values_list(
+                'pk', flat=True
+            )
+        ) == [empty.pk]
@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.test import APIClient
+from reviews.models import Genre, Review
+
+pytestmark = pytest.mark.skipif(
+    'replica' not in connections.databases,
+    reason='Нужна база replica (SQLite в тестах без DB_HOST)',
+)
+
+
+@pytest.fixture
+def replica(settings):
+    settings.READ_REPLICA = 'replica'
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+class TestReplicaRouting:
+
+    def test_safe_methods_read_replica(self, client, catalogue, replica):
+        catalogue(titles=3, reviews=0, comments=0)
+        # Реплика пустая: данные из основной базы туда не попали.
+        assert client.get('/api/v1/titles/').json()['results'] == [], (
+            'Проверьте, что GET-запросы читают реплику'
+        )
+
+    def test_without_replica_reads_default(self, client, catalogue):
+        catalogue(titles=3, reviews=0, comments=0)
+        assert len(client.get('/api/v1/titles/').json()['results']) == 3
+
+    def test_read_your_writes(self, user_client, client, catalogue, user,
+                              replica):
+        title, _ = catalogue(titles=1, reviews=0, comments=0)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = user_client.post(url, {'text': 'отзыв', 'score': 9})
+        assert response.status_code == 201, (
+            'Проверьте, что запись идёт в основную базу'
+        )
+        assert Review.objects.using('default').filter(author=user).exists()
+        assert client.get(url).status_code == 404
+        response = user_client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что автор сразу после записи читает основную базу'
+        )
+        assert response.json()['count'] == 1
+        cache.clear()
+        assert user_client.get(url).status_code == 404, (
+            'Проверьте, что после окна REPLICA_PIN_SECONDS автор снова '
+            'читает реплику'
+        )
+
+    def test_replica_reads_after_write_are_not_cached(
+            self, admin_client, django_user_model, replica):
+        # Реплика отстаёт: жанр есть только в основной базе.
+        admin_client.post('/api/v1/genres/', {'name': 'Нуар', 'slug': 'noir'})
+        assert Genre.objects.using('default').filter(slug='noir').exists()
+        other_admin = APIClient()
+        other_admin.force_authenticate(
+            django_user_model.objects.create_user(
+                username='OtherAdmin', email='other@yamdb.fake',
+                role='admin',
+            )
+        )
+        assert other_admin.get('/api/v1/genres/').json()['results'] == []
+        slugs = [
+            genre['slug']
+            for genre in admin_client.get('/api/v1/genres/').json()['results']
+        ]
+        assert slugs == ['noir'], (
+            'Проверьте, что ответ, прочитанный с отстающей реплики сразу '
+            'после записи, не попадает в кэш'
+        )
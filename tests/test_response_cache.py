@@ -0,0 +1,55 @@
+import pytest
+from reviews.models import Genre, Review
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_titles_list_is_cached(self, client, catalogue,
+                                   django_assert_num_queries):
+        catalogue()
+        first = client.get('/api/v1/titles/?limit=3')
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/?limit=3')
+        assert second.json() == first.json()
+
+    def test_query_params_are_part_of_key(self, client, catalogue):
+        catalogue()
+        client.get('/api/v1/titles/?limit=3')
+        response = client.get('/api/v1/titles/?limit=4')
+        assert len(response.json()['results']) == 4
+
+    def test_review_invalidates_only_its_title(
+            self, client, user, catalogue, django_assert_num_queries):
+        title, _ = catalogue()
+        # Произведение 0 первое по имени, в ?offset=5 его нет.
+        client.get('/api/v1/titles/?limit=5')
+        client.get('/api/v1/titles/?limit=5&offset=5')
+        client.get(f'/api/v1/titles/{title.id}/')
+        Review.objects.create(title=title, author=user, text='x', score=1)
+
+        with django_assert_num_queries(0):
+            client.get('/api/v1/titles/?limit=5&offset=5')
+        detail = client.get(f'/api/v1/titles/{title.id}/').json()
+        first_page = client.get('/api/v1/titles/?limit=5').json()
+        expected = (7 * 20 + 1) // 21
+        assert detail['rating'] == expected, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+        assert first_page['results'][0]['rating'] == expected
+
+    def test_genre_change_invalidates_titles(self, client, catalogue):
+        title, _ = catalogue()
+        client.get(f'/api/v1/titles/{title.id}/')
+        genre = Genre.objects.get(slug='genre_0')
+        genre.name = 'Новое имя'
+        genre.save()
+        detail = client.get(f'/api/v1/titles/{title.id}/').json()
+        assert detail['genre'][0]['name'] == 'Новое имя'
+
+    def test_create_invalidates_slug_list(self, admin_client, catalogue):
+        catalogue()
+        before = admin_client.get('/api/v1/genres/').json()
+        admin_client.post('/api/v1/genres/', {'name': 'Нуар', 'slug': 'noir'})
+        after = admin_client.get('/api/v1/genres/').json()
+        assert after['count'] == before['count'] + 1
@@ -0,0 +1,24 @@
+import pytest
+from reviews.models import Category, Title
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_matches_name_and_description(self, client):
+        category = Category.objects.create(name='Книги', slug='books')
+        by_name = Title.objects.create(
+            name='Звёздная тайна', year=2000, category=category
+        )
+        by_description = Title.objects.create(
+            name='Остров', year=2001, category=category,
+            description='Старая тайна маяка',
+        )
+        Title.objects.create(name='Зима', year=2002, category=category)
+
+        response = client.get('/api/v1/titles/?search=тайна')
+        assert response.status_code == 200
+        ids = {item['id'] for item in response.json()['results']}
+        assert ids == {by_name.id, by_description.id}, (
+            'Проверьте, что поиск идёт по названию и описанию произведения'
+        )
@@ -0,0 +1,118 @@
+import pytest
+from api.throttling import ScopedThrottle, SlidingWindowThrottle
+from django.core.cache import cache
+
+
+class Clock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CountingCache:
+    '''Считает обращения к кэшу.'''
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        self.calls += 1
+        return getattr(cache, name)
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates,
+        }
+    SlidingWindowThrottle.previous_counts.clear()
+    yield set_rates
+    SlidingWindowThrottle.previous_counts.clear()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(6000.0)
+    monkeypatch.setattr(SlidingWindowThrottle, 'timer', clock)
+    return clock
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_auth_is_limited_per_ip(self, client, rates):
+        rates(auth='3/min')
+        url = '/api/v1/auth/token/'
+        for _ in range(3):
+            assert client.post(url, {}).status_code == 400
+        response = client.post(url, {})
+        assert response.status_code == 429, (
+            'Проверьте, что получение токена ограничено по IP'
+        )
+        assert int(response['Retry-After']) <= 60
+        assert client.post(
+            url, {}, REMOTE_ADDR='10.0.0.2'
+        ).status_code == 400, 'Проверьте, что лимит считается на IP'
+
+    def test_scopes_have_separate_budgets(self, user_client, catalogue,
+                                          rates):
+        rates(reviews='1/min', comments='5/min', catalogue='100/min')
+        title, review = catalogue(titles=2, reviews=1, comments=0)
+        url = '/api/v1/titles/{}/reviews/'
+        data = {'text': 'отзыв', 'score': 5}
+        assert user_client.post(url.format(title.id), data).status_code == 201
+        other = title.__class__.objects.exclude(pk=title.pk).get()
+        assert user_client.post(url.format(other.id), data).status_code == 429
+        assert user_client.get(url.format(title.id)).status_code == 200, (
+            'Проверьте, что чтение не расходует бюджет создания отзывов'
+        )
+        response = user_client.post(
+            f'{url.format(title.id)}{review.id}/comments/', {'text': 'да'}
+        )
+        assert response.status_code == 201
+
+    def test_sliding_window(self, client, rates, clock):
+        rates(catalogue='10/min')
+        clock.now = 6050.0
+        for _ in range(10):
+            assert client.get('/api/v1/genres/').status_code == 200
+        assert client.get('/api/v1/genres/').status_code == 429
+        # Следующее окно: прошлые 11 запросов учитываются с весом 5/6.
+        clock.now = 6070.0
+        assert client.get('/api/v1/genres/').status_code == 429, (
+            'Проверьте, что окно скользит, а не сбрасывается целиком'
+        )
+        clock.now = 6110.0
+        assert client.get('/api/v1/genres/').status_code == 200
+
+    def test_one_cache_round_trip(self, client, rates, clock, monkeypatch):
+        rates(catalogue='100/min')
+        client.get('/api/v1/genres/')
+        counting = CountingCache()
+        monkeypatch.setattr(ScopedThrottle, 'cache', counting)
+        client.get('/api/v1/genres/')
+        assert counting.calls == 1, (
+            'Проверьте, что решение о лимите — одно обращение к кэшу'
+        )
+
+    def test_batch_is_charged_per_item(self, user_client, catalogue, rates):
+        rates(reviews='2/hour')
+        title, _ = catalogue(titles=3, reviews=0, comments=0)
+        titles = title.__class__.objects.values_list('pk', flat=True)
+        items = [
+            {'title': pk, 'text': 'отзыв', 'score': 5} for pk in titles
+        ]
+        response = user_client.post(
+            '/api/v1/reviews/batch/', {'items': items}, format='json'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что пакет расходует лимит за каждый элемент'
+        )
+        response = user_client.post(
+            '/api/v1/reviews/batch/', {'items': items[:1]}, format='json'
+        )
+        assert response.status_code == 207
@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def genres():
+    Category.objects.create(name='Фильм', slug='films')
+    return [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre_{i}')
+        for i in range(5)
+    ]
+
+
+def title_data(genre_slugs):
+    return {'name': 'Фильм', 'year': 2000, 'category': 'films',
+            'description': 'описание', 'genre': genre_slugs}
+
+
+def links(title):
+    through = Title.genre.through
+    return dict(through.objects.filter(title=title).values_list(
+        'genre__slug', 'pk'
+    ))
+
+
+@pytest.mark.django_db
+class TestTitleGenres:
+
+    def test_update_changes_only_diff(self, admin_client, genres):
+        response = admin_client.post(
+            URL, title_data(['genre_0', 'genre_1', 'genre_2']), format='json'
+        )
+        assert response.status_code == 201
+        title = Title.objects.get(pk=response.json()['id'])
+        before = links(title)
+        response = admin_client.patch(
+            f'{URL}{title.id}/', {'genre': ['genre_1', 'genre_2', 'genre_3']},
+            format='json'
+        )
+        assert response.status_code == 200
+        assert sorted(response.json()['genre']) == [
+            'genre_1', 'genre_2', 'genre_3'
+        ]
+        after = links(title)
+        assert set(after) == {'genre_1', 'genre_2', 'genre_3'}
+        for slug in ('genre_1', 'genre_2'):
+            assert after[slug] == before[slug], (
+                'Проверьте, что неизменные жанры не удаляются и не '
+                'вставляются заново'
+            )
+        detail = admin_client.get(f'{URL}{title.id}/').json()
+        assert [genre['slug'] for genre in detail['genre']] == [
+            'genre_1', 'genre_2', 'genre_3'
+        ], 'Проверьте, что кэш карточки сброшен после смены жанров'
+
+    def test_slugs_resolved_in_one_query(self, admin_client, genres):
+        counts = []
+        for slugs in (['genre_0'], [genre.slug for genre in genres]):
+            with CaptureQueriesContext(connection) as queries:
+                response = admin_client.post(
+                    URL, title_data(slugs), format='json'
+                )
+            assert response.status_code == 201
+            counts.append(len(queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число запросов не зависит от числа жанров'
+        )
+
+    @pytest.mark.parametrize('slugs', (
+        ['genre_0', 'nope', 'other'], 'genre_0', [{'slug': 'genre_0'}],
+    ))
+    def test_errors_are_unchanged(self, admin_client, genres, slugs):
+        response = admin_client.post(URL, title_data(slugs), format='json')
+        assert response.status_code == 400
+        field = serializers.SlugRelatedField(
+            slug_field='slug', many=True, queryset=Genre.objects.all()
+        )
+        with pytest.raises(serializers.ValidationError) as error:
+            field.run_validation(slugs)
+        assert response.json()['genre'] == error.value.detail, (
+            'Проверьте, что ошибки жанров не изменились'
+        )
@@ -0,0 +1,93 @@
+import pytest
+from django.conf import settings
+from reviews.models import Category, Review, Title
+
+
+def ids(response):
+    return [item['id'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestTitleOrdering:
+
+    @pytest.fixture
+    def titles(self, django_user_model):
+        '''Хит с пятью девятками, новинка с одной десяткой и без отзывов.'''
+        category = Category.objects.create(name='Книги', slug='books')
+        hit, newcomer, unrated = (
+            Title.objects.create(name=name, year=year, category=category)
+            for name, year in (('Хит', 1990), ('Новинка', 2020),
+                               ('Без отзывов', 2005))
+        )
+        authors = [
+            django_user_model.objects.create(
+                username=f'author_{i}', email=f'author_{i}@yamdb.fake'
+            )
+            for i in range(5)
+        ]
+        for author in authors:
+            Review.objects.create(
+                title=hit, author=author, text='отзыв', score=9
+            )
+        Review.objects.create(
+            title=newcomer, author=authors[0], text='отзыв', score=10
+        )
+        return hit, newcomer, unrated
+
+    def test_ranking_is_bayesian(self, titles):
+        hit, newcomer, unrated = (
+            Title.objects.get(pk=title.pk) for title in titles
+        )
+        weight, mean = settings.RATING_PRIOR_WEIGHT, settings.RATING_PRIOR_MEAN
+        assert hit.ranking == pytest.approx(
+            (weight * mean + 45) / (weight + 5)
+        ), 'Проверьте, что байесовская оценка обновляется с отзывами'
+        assert unrated.ranking == pytest.approx(mean), (
+            'Проверьте, что у произведения без отзывов оценка равна '
+            'априорному среднему'
+        )
+        assert hit.ranking > newcomer.ranking
+
+    def test_ordering(self, client, titles):
+        hit, newcomer, unrated = titles
+        cases = {
+            '-ranking': [hit.id, newcomer.id, unrated.id],
+            '-rating': [newcomer.id, hit.id, unrated.id],
+            'rating': [hit.id, newcomer.id, unrated.id],
+            '-reviews_count': [hit.id, newcomer.id, unrated.id],
+            '-year': [newcomer.id, unrated.id, hit.id],
+        }
+        for ordering, expected in cases.items():
+            response = client.get(f'/api/v1/titles/?ordering={ordering}')
+            assert response.status_code == 200
+            assert ids(response) == expected, (
+                f'Проверьте сортировку `?ordering={ordering}`; произведения '
+                'без рейтинга должны идти в конце'
+            )
+
+    def test_ordering_with_cursor(self, client, titles):
+        hit, newcomer, unrated = titles
+        response = client.get(
+            '/api/v1/titles/?ordering=-ranking&cursor=&limit=2'
+        )
+        assert ids(response) == [hit.id, newcomer.id]
+        response = client.get(response.json()['next'])
+        assert ids(response) == [unrated.id]
+
+        response = client.get('/api/v1/titles/?ordering=-rating&cursor=')
+        assert response.status_code == 400, (
+            'Проверьте, что курсор с сортировкой по полю с пустыми '
+            'значениями отклоняется'
+        )
+
+    def test_review_invalidates_rating_ordering_cache(self, client, user,
+                                                      titles):
+        hit, newcomer, unrated = titles
+        url = '/api/v1/titles/?ordering=-rating&limit=1'
+        assert ids(client.get(url)) == [newcomer.id]
+        # Рейтинг как у новинки, при равенстве выше больший id.
+        Review.objects.create(title=unrated, author=user, text='x', score=10)
+        assert ids(client.get(url)) == [unrated.id], (
+            'Проверьте, что отзыв сбрасывает кэш списков, отсортированных '
+            'по рейтингу'
+        )
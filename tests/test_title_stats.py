@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+from django.db import connection
+from reviews.models import Category, Review, Title, TitleStats
+
+
+def histogram(title):
+    return TitleStats.objects.get(title=title).histogram
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    @pytest.fixture
+    def titles(self):
+        category = Category.objects.create(name='Книги', slug='books')
+        return [
+            Title.objects.create(name=name, year=2000, category=category)
+            for name in ('Первое', 'Второе')
+        ]
+
+    def test_histogram_follows_reviews(self, titles, user, admin):
+        first, second = titles
+        assert histogram(first) == [0] * 10, (
+            'Проверьте, что статистика создаётся вместе с произведением'
+        )
+        review = Review.objects.create(
+            title=first, author=user, text='отзыв', score=3
+        )
+        Review.objects.create(title=first, author=admin, text='отзыв', score=3)
+        assert histogram(first)[2] == 2
+
+        review.score = 9
+        review.save()
+        assert histogram(first)[2] == 1 and histogram(first)[8] == 1, (
+            'Проверьте, что при изменении оценки отзыв переходит в другую '
+            'корзину гистограммы'
+        )
+
+        review.title = second
+        review.save()
+        assert histogram(first)[8] == 0
+        assert histogram(second)[8] == 1
+
+        review.delete()
+        assert sum(histogram(second)) == 0
+
+    def test_stale_instances_keep_histogram(self, titles, user, admin):
+        Review.objects.create(
+            title=titles[0], author=admin, text='отзыв', score=5
+        )
+        review = Review.objects.create(
+            title=titles[0], author=user, text='отзыв', score=5
+        )
+        first, second, third = (
+            Review.objects.get(pk=review.pk) for _ in range(3)
+        )
+        first.score = 7
+        first.save()
+        second.score = 9
+        second.save()
+        third.delete()
+        assert histogram(titles[0]) == [0, 0, 0, 0, 1] + [0] * 5, (
+            'Проверьте, что гистограмма меняется от оценки в базе, '
+            'а не от устаревшей копии отзыва'
+        )
+
+    def test_recalculate_matches_signals(self, titles, user):
+        Review.objects.create(
+            title=titles[0], author=user, text='отзыв', score=5
+        )
+        expected = histogram(titles[0])
+        TitleStats.objects.update(score_5=0)
+        TitleStats.objects.recalculate()
+        assert histogram(titles[0]) == expected
+
+    def test_detail_has_stats(self, client, titles, user):
+        Review.objects.create(
+            title=titles[0], author=user, text='отзыв', score=10
+        )
+        response = client.get(f'/api/v1/titles/{titles[0].id}/')
+        assert response.status_code == 200
+        assert response.json()['stats'] == {
+            'count': 1, 'sum': 10, 'histogram': [0] * 9 + [1],
+        }, 'Проверьте, что карточка произведения содержит статистику оценок'
+
+    def test_list_stats_on_request(self, client, catalogue,
+                                   django_assert_num_queries):
+        catalogue()
+        response = client.get('/api/v1/titles/')
+        assert 'stats' not in response.json()['results'][0], (
+            'Проверьте, что список произведений без ?include=stats '
+            'не содержит статистику'
+        )
+        # статистика приходит в запросе страницы через select_related
+        with django_assert_num_queries(4):
+            response = client.get('/api/v1/titles/?include=stats')
+        assert all('stats' in item for item in response.json()['results'])
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentScoreUpdates:
+
+    def test_parallel_edits(self, user):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Блокировки строк проверяются на PostgreSQL')
+        category = Category.objects.create(name='Книги', slug='books')
+        title = Title.objects.create(name='Книга', year=2000,
+                                     category=category)
+        review = Review.objects.create(
+            title=title, author=user, text='отзыв', score=5
+        )
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def edit(score):
+            try:
+                stale = Review.objects.get(pk=review.pk)
+                barrier.wait()
+                stale.score = score
+                stale.save()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=edit, args=(score,)) for score in (7, 9)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        score = Review.objects.get(pk=review.pk).score
+        assert sum(histogram(title)) == 1
+        assert histogram(title)[score - 1] == 1, (
+            'Проверьте, что одновременные изменения оценки не портят '
+            'гистограмму'
+        )
+        assert Title.objects.get(pk=title.pk).score_sum == score